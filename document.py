@@ -0,0 +1,235 @@
+import math
+from collections import OrderedDict, defaultdict
+import numpy as np
+from utils import decompose_polygon_sweep, repeat_ranges
+
+
+class RectangleGrid:
+    """
+    Рівномірна сітка над прямокутниками розбивки одного полігону для відсікання вікном.
+
+    Пари «прямокутник-клітинка» впорядковані за клітинкою, тож запит збирає
+    лише відрізки клітинок у вікні. Розмір сітки
+    зменшується, доки пар не більше за max_pairs на прямокутник, щоб довгі
+    смуги замітання не розмножувались по всіх стовпцях.
+    """
+
+    def __init__(self, rectangles, max_pairs=4):
+        rects = np.asarray(rectangles, dtype=np.float64).reshape(-1, 4)
+        self.rects = np.column_stack((
+            np.minimum(rects[:, 0], rects[:, 2]), np.minimum(rects[:, 1], rects[:, 3]),
+            np.maximum(rects[:, 0], rects[:, 2]), np.maximum(rects[:, 1], rects[:, 3]),
+        ))
+        # Смуги нульової площі з замітання нічого не зафарбовують
+        self.nonempty = np.nonzero((self.rects[:, 2] > self.rects[:, 0]) & (self.rects[:, 3] > self.rects[:, 1]))[0]
+        if not len(self.nonempty):
+            self.size = 0
+            return
+        rects = self.rects[self.nonempty]
+        self.origin = rects[:, :2].min(axis=0)
+        extent = np.maximum(rects[:, 2:].max(axis=0) - self.origin, 1e-9)
+
+        size = max(1, math.isqrt(len(rects)))
+        while True:
+            self.size = size
+            self.cell = extent / size
+            c0, r0, c1, r1 = self._cell_range(rects)
+            counts = (c1 - c0 + 1) * (r1 - r0 + 1)
+            if size == 1 or counts.sum() <= max_pairs * len(rects):
+                break
+            size = max(1, size // 2)
+
+        widths = c1 - c0 + 1
+        pos, local = repeat_ranges(counts)
+        cell = (r0[pos] + local // widths[pos]) * size + c0[pos] + local % widths[pos]
+        order = np.argsort(cell, kind='stable')
+        self.ids = self.nonempty[pos[order]]
+        self.starts = np.searchsorted(cell[order], np.arange(size * size + 1))
+
+    def _cell_range(self, boxes):
+        """Діапазони клітинок [c0, c1] x [r0, r1] для масиву (k, 4)."""
+        lo = np.clip(np.floor((boxes[:, :2] - self.origin) / self.cell), 0, self.size - 1).astype(np.int64)
+        hi = np.clip(np.floor((boxes[:, 2:] - self.origin) / self.cell), 0, self.size - 1).astype(np.int64)
+        return lo[:, 0], lo[:, 1], hi[:, 0], hi[:, 1]
+
+    def query(self, x1, y1, x2, y2):
+        """Індекси прямокутників ненульової площі, що перетинають вікно, за зростанням (порядок розбивки)."""
+        if not self.size:
+            return np.empty(0, dtype=np.int64)
+        c0, r0, c1, r1 = (int(v[0]) for v in self._cell_range(np.array([[x1, y1, x2, y2]], dtype=np.float64)))
+        if (c1 - c0 + 1) * (r1 - r0 + 1) == self.size * self.size:
+            candidates = self.nonempty
+        else:
+            candidates = np.unique(np.concatenate([self.ids[self.starts[r * self.size + c0]:
+                                                            self.starts[r * self.size + c1 + 1]]
+                                                   for r in range(r0, r1 + 1)]))
+        rects = self.rects[candidates]
+        hit = (rects[:, 0] <= x2) & (rects[:, 2] >= x1) & (rects[:, 1] <= y2) & (rects[:, 3] >= y1)
+        return candidates[hit]
+
+
+class PolygonDocument:
+    """
+    Набір багатьох полігонів з індексом їхніх обмежувальних прямокутників.
+
+    Обмежувальні прямокутники розкладені по рівномірній сітці кошиків, тож
+    запит вікна переглядає лише кошики в ньому. Полігони, що накривають понад
+    max_cells кошиків, зберігаються окремим списком і перевіряються напряму.
+
+    Розбивка на прямокутники обчислюється лише на запит (для видимих полігонів
+    або явно) і тримається в LRU-кеші на max_cached полігонів, тому пам'ять
+    розбивок залежить від того, що на екрані, а не від розміру документа.
+    """
+
+    def __init__(self, cell_size=1000.0, max_cells=64, max_cached=1024, direction='auto'):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self.max_cached = max_cached
+        self.direction = direction
+        self.polygons = {}                # id -> [(x, y), ...]
+        self.holes = {}                   # id -> контури отворів, лише для полігонів з отворами
+        self.bounds = {}                  # id -> (x1, y1, x2, y2)
+        self.buckets = defaultdict(set)   # клітинка -> id
+        self.large = set()                # id полігонів поза сіткою
+        self.decompositions = OrderedDict()
+        self.rectangle_grids = {}         # id -> RectangleGrid кешованої розбивки
+        self.next_id = 0
+
+    def __len__(self):
+        return len(self.polygons)
+
+    def __contains__(self, polygon_id):
+        return polygon_id in self.polygons
+
+    def clear(self):
+        self.polygons = {}
+        self.holes = {}
+        self.bounds = {}
+        self.buckets = defaultdict(set)
+        self.large = set()
+        self.decompositions = OrderedDict()
+        self.rectangle_grids = {}
+
+    def _cell_range(self, x1, y1, x2, y2):
+        c = self.cell_size
+        return (math.floor(x1 / c), math.floor(y1 / c), math.floor(x2 / c), math.floor(y2 / c))
+
+    def _cells(self, polygon_id):
+        i0, j0, i1, j1 = self._cell_range(*self.bounds[polygon_id])
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > self.max_cells:
+            return None
+        return [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+
+    def add(self, polygon, rectangles=None, holes=()):
+        """
+        Додає полігон (без повтору першої вершини в кінці).
+
+        Args:
+            polygon: Вершини (x, y)
+            rectangles: Готова розбивка, якщо вона вже відома
+            holes: Контури отворів
+
+        Returns:
+            int: Ідентифікатор полігону
+        """
+        polygon = [(x, y) for x, y in polygon]
+        if not polygon:
+            raise ValueError("Polygon has no vertices")
+        polygon_id = self.next_id
+        self.next_id += 1
+
+        xs = [x for x, _ in polygon]
+        ys = [y for _, y in polygon]
+        self.polygons[polygon_id] = polygon
+        holes = [[(x, y) for x, y in hole] for hole in holes]
+        if holes:
+            self.holes[polygon_id] = holes
+        self.bounds[polygon_id] = (min(xs), min(ys), max(xs), max(ys))
+
+        cells = self._cells(polygon_id)
+        if cells is None:
+            self.large.add(polygon_id)
+        else:
+            for cell in cells:
+                self.buckets[cell].add(polygon_id)
+
+        if rectangles is not None:
+            self.store_decomposition(polygon_id, rectangles)
+        return polygon_id
+
+    def remove(self, polygon_id):
+        """Видаляє полігон разом із його кешованою розбивкою."""
+        cells = self._cells(polygon_id)
+        if cells is None:
+            self.large.discard(polygon_id)
+        else:
+            for cell in cells:
+                bucket = self.buckets[cell]
+                bucket.discard(polygon_id)
+                if not bucket:
+                    del self.buckets[cell]
+        del self.polygons[polygon_id]
+        self.holes.pop(polygon_id, None)
+        del self.bounds[polygon_id]
+        self.decompositions.pop(polygon_id, None)
+        self.rectangle_grids.pop(polygon_id, None)
+
+    def query(self, x1, y1, x2, y2):
+        """
+        Шукає полігони, обмежувальні прямокутники яких перетинають вікно.
+
+        Returns:
+            List[int]: Ідентифікатори у порядку додавання (порядок малювання)
+        """
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        i0, j0, i1, j1 = self._cell_range(x1, y1, x2, y2)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.buckets):
+            # При сильному віддаленні непорожніх кошиків менше, ніж клітинок у вікні
+            buckets = [b for (i, j), b in self.buckets.items() if i0 <= i <= i1 and j0 <= j <= j1]
+        else:
+            buckets = [self.buckets[(i, j)] for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)
+                       if (i, j) in self.buckets]
+
+        found = set(self.large).union(*buckets)
+        result = []
+        for polygon_id in found:
+            bx1, by1, bx2, by2 = self.bounds[polygon_id]
+            if bx1 <= x2 and bx2 >= x1 and by1 <= y2 and by2 >= y1:
+                result.append(polygon_id)
+        result.sort()
+        return result
+
+    def store_decomposition(self, polygon_id, rectangles):
+        """Кладе готову розбивку (список ((x1, y1), (x2, y2)) або масив (r, 4)) в кеш, витісняючи найдавніше використані."""
+        self.decompositions[polygon_id] = rectangles
+        self.decompositions.move_to_end(polygon_id)
+        self.rectangle_grids.pop(polygon_id, None)
+        while len(self.decompositions) > self.max_cached:
+            evicted, _ = self.decompositions.popitem(last=False)
+            self.rectangle_grids.pop(evicted, None)
+
+    def decomposition(self, polygon_id):
+        """Повертає розбивку полігону, обчислюючи її при першому запиті."""
+        rectangles = self.decompositions.get(polygon_id)
+        if rectangles is None:
+            rectangles = decompose_polygon_sweep(self.polygons[polygon_id], self.holes.get(polygon_id, ()),
+                                                 direction=self.direction)
+            self.store_decomposition(polygon_id, rectangles)
+        else:
+            self.decompositions.move_to_end(polygon_id)
+        return rectangles
+
+    def visible_rectangles(self, polygon_id, x1, y1, x2, y2):
+        """
+        Прямокутники розбивки полігону, що перетинають вікно.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Масив (k, 4) x1, y1, x2, y2 та їхні індекси в розбивці
+        """
+        rectangles = self.decomposition(polygon_id)
+        grid = self.rectangle_grids.get(polygon_id)
+        if grid is None:
+            grid = self.rectangle_grids[polygon_id] = RectangleGrid(rectangles)
+        ids = grid.query(min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+        return grid.rects[ids], ids
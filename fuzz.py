@@ -0,0 +1,354 @@
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+from collections import deque
+import numpy as np
+from utils import decompose_polygon_sweep, decompose_polygon_sweep_parallel, merge_vertical_strips
+from project_io import write_project_json, write_project_binary, load_project
+from generators import (generate_comb_polygon, generate_staircase_polygon, generate_orthoconvex_polygon,
+                        generate_spiral_polygon, generate_polygon_with_holes)
+
+# Усі рушії розбивки з однаковим інтерфейсом (polygon, holes) -> прямокутники.
+# decompose_polygon_sweep з direction='y' - еталон, з яким звіряються решта.
+ENGINES = {
+    'sweep-y': lambda polygon, holes: decompose_polygon_sweep(polygon, holes, direction='y'),
+    'sweep-x': lambda polygon, holes: decompose_polygon_sweep(polygon, holes, direction='x'),
+    'sweep-auto': lambda polygon, holes: decompose_polygon_sweep(polygon, holes, direction='auto'),
+    'sweep-merged': lambda polygon, holes: merge_vertical_strips(decompose_polygon_sweep(polygon, holes)),
+    'slabs-y': lambda polygon, holes: decompose_polygon_sweep_parallel(polygon, workers=1, slabs=3, holes=holes),
+    'slabs-x': lambda polygon, holes: decompose_polygon_sweep_parallel(polygon, workers=1, slabs=7, holes=holes,
+                                                                       direction='x'),
+    'slabs-merged': lambda polygon, holes: decompose_polygon_sweep_parallel(polygon, workers=1, slabs=5, merge=True,
+                                                                            holes=holes),
+    'slabs-auto-merged': lambda polygon, holes: decompose_polygon_sweep_parallel(polygon, workers=1, slabs=4,
+                                                                                 merge=True, holes=holes,
+                                                                                 direction='auto'),
+    # Справжній пул процесів: та сама логіка шарів, що й slabs-*, але повільний старт, тому не за замовчуванням
+    'pool': lambda polygon, holes: decompose_polygon_sweep_parallel(polygon, workers=2, slabs=4, holes=holes),
+}
+DEFAULT_ENGINES = [name for name in ENGINES if name != 'pool']
+
+_FAMILIES = [generate_comb_polygon, generate_staircase_polygon, generate_orthoconvex_polygon,
+             generate_spiral_polygon, generate_polygon_with_holes]
+
+
+def _inside_cells(rings, xs, ys):
+    """Маска клітинок стиснутої сітки, що лежать усередині контурів (правило парності)."""
+    rows, cols = len(ys) - 1, len(xs) - 1
+    # Вертикальне ребро x = xs[c] на рядках [k1, k2) перемикає клітинки зі стовпцями >= c
+    crossings = np.zeros((rows + 1, cols + 1), dtype=np.int64)
+    for ring in rings:
+        nxt = np.roll(ring, -1, axis=0)
+        vertical = (ring[:, 0] == nxt[:, 0]) & (ring[:, 1] != nxt[:, 1])
+        c = np.searchsorted(xs, ring[vertical, 0])
+        k1 = np.searchsorted(ys, np.minimum(ring[vertical, 1], nxt[vertical, 1]))
+        k2 = np.searchsorted(ys, np.maximum(ring[vertical, 1], nxt[vertical, 1]))
+        np.add.at(crossings, (k1, c), 1)
+        np.add.at(crossings, (k2, c), -1)
+    return (crossings.cumsum(axis=0).cumsum(axis=1)[:rows, :cols] & 1).astype(bool)
+
+
+def check_coverage(polygon, holes, rectangles):
+    """
+    Точний оракул покриття на стиснутій сітці координат.
+
+    Усі різні X та Y полігону, отворів і прямокутників ділять площину на клітинки,
+    межі яких не перетинає жодне ребро, тож кожна клітинка або повністю всередині,
+    або повністю зовні, і покрита цілим числом прямокутників. Належність клітинки
+    полігону - парність вертикальних ребер ліворуч, кількість покриттів - 2D
+    префіксні суми по кутах прямокутників.
+
+    Returns:
+        str | None: Опис першої знайденої помилки (перекриття, дірка, вихід за межі)
+        або None, якщо прямокутники точно покривають полігон
+    """
+    rings = [np.asarray(ring, dtype=np.float64).reshape(-1, 2) for ring in (polygon, *holes)]
+    rects = np.asarray(rectangles, dtype=np.float64).reshape(-1, 4)
+    if not np.isfinite(rects).all():
+        return "non-finite rectangle coordinates"
+    inverted = np.nonzero((rects[:, 2] < rects[:, 0]) | (rects[:, 3] < rects[:, 1]))[0]
+    if len(inverted):
+        return f"inverted rectangle #{inverted[0]}: {rects[inverted[0]].tolist()}"
+
+    xs = np.unique(np.concatenate([ring[:, 0] for ring in rings] + [rects[:, 0], rects[:, 2]]))
+    ys = np.unique(np.concatenate([ring[:, 1] for ring in rings] + [rects[:, 1], rects[:, 3]]))
+    rows, cols = len(ys) - 1, len(xs) - 1
+    if rows < 1 or cols < 1:
+        return None if not len(rects) else "rectangles for a polygon with no area"
+
+    inside = _inside_cells(rings, xs, ys)
+    cover = np.zeros((rows + 1, cols + 1), dtype=np.int64)
+    c1, c2 = np.searchsorted(xs, rects[:, 0]), np.searchsorted(xs, rects[:, 2])
+    r1, r2 = np.searchsorted(ys, rects[:, 1]), np.searchsorted(ys, rects[:, 3])
+    np.add.at(cover, (r1, c1), 1)
+    np.add.at(cover, (r1, c2), -1)
+    np.add.at(cover, (r2, c1), -1)
+    np.add.at(cover, (r2, c2), 1)
+    cover = cover.cumsum(axis=0).cumsum(axis=1)[:rows, :cols]
+
+    for name, bad in (("overlap", cover > 1), ("gap", inside & (cover == 0)), ("outside", ~inside & (cover > 0))):
+        if bad.any():
+            k, i = np.argwhere(bad)[0]
+            return (f"{name} in {int(bad.sum())} cells, first at "
+                    f"[{xs[i]:g}, {xs[i + 1]:g}] x [{ys[k]:g}, {ys[k + 1]:g}]")
+    return None
+
+
+def normalize_cells(cells):
+    """
+    Робить з маски клітинок коректний полігон: заповнює діагональні дотики 2x2
+    (вершина, спільна для двох контурів) і залишає найбільшу 4-зв'язну компоненту.
+
+    Returns:
+        np.ndarray | None: Нормалізована маска або None, якщо вона порожня
+    """
+    cells = np.array(cells, dtype=bool)
+    while True:
+        a, b, c, d = cells[:-1, :-1], cells[:-1, 1:], cells[1:, :-1], cells[1:, 1:]
+        pinch = (a == d) & (b == c) & (a != b)
+        if not pinch.any():
+            break
+        k, i = np.nonzero(pinch)
+        cells[k, i] = cells[k, i + 1] = cells[k + 1, i] = cells[k + 1, i + 1] = True
+
+    # Пошук компонент у ширину; маски невеликі
+    labels = np.zeros(cells.shape, dtype=np.int64)
+    sizes = [0]
+    for start in zip(*np.nonzero(cells)):
+        if labels[start]:
+            continue
+        sizes.append(0)
+        labels[start] = len(sizes) - 1
+        queue = deque([start])
+        while queue:
+            k, i = queue.popleft()
+            sizes[-1] += 1
+            for nk, ni in ((k - 1, i), (k + 1, i), (k, i - 1), (k, i + 1)):
+                if 0 <= nk < cells.shape[0] and 0 <= ni < cells.shape[1] and cells[nk, ni] and not labels[nk, ni]:
+                    labels[nk, ni] = labels[start]
+                    queue.append((nk, ni))
+    if len(sizes) == 1:
+        return None
+    return labels == int(np.argmax(sizes))
+
+
+def cells_to_rings(cells, xs, ys):
+    """
+    Обходить межу маски клітинок і повертає зовнішній контур та отвори.
+
+    Клітинка (k, i) займає [xs[i], xs[i + 1]] x [ys[k], ys[k + 1]]. Одиничні ребра
+    межі орієнтовані так, що клітинка ліворуч, і після normalize_cells з кожної
+    вершини виходить рівно одне ребро. Колінеарні вершини відкидаються.
+    """
+    padded = np.pad(cells, 1)
+    nxt = {}
+    for k, i in zip(*np.nonzero(cells)):
+        if not padded[k, i + 1]:            # знизу
+            nxt[(i, k)] = (i + 1, k)
+        if not padded[k + 1, i + 2]:        # праворуч
+            nxt[(i + 1, k)] = (i + 1, k + 1)
+        if not padded[k + 2, i + 1]:        # зверху
+            nxt[(i + 1, k + 1)] = (i, k + 1)
+        if not padded[k + 1, i]:            # ліворуч
+            nxt[(i, k + 1)] = (i, k)
+
+    # Нижня ліва вершина найнижчої клітинки лежить на зовнішньому контурі
+    k, i = min((k, i) for k, i in zip(*np.nonzero(cells)))
+    starts = [(i, k)] + sorted(nxt)
+    rings = []
+    for start in starts:
+        if start not in nxt:
+            continue
+        lattice = [start]
+        point = nxt.pop(start)
+        while point != start:
+            lattice.append(point)
+            point = nxt.pop(point)
+        ring = []
+        for j, (pi, pk) in enumerate(lattice):
+            (ai, ak), (bi, bk) = lattice[j - 1], lattice[(j + 1) % len(lattice)]
+            if (pi - ai) * (bk - pk) != (pk - ak) * (bi - pi):
+                ring.append((xs[pi], ys[pk]))
+        rings.append(ring)
+    return rings[0], rings[1:]
+
+
+def polygon_to_cells(polygon, holes=()):
+    """Маска полігону на його стиснутій сітці координат: (cells, xs, ys)."""
+    rings = [np.asarray(ring, dtype=np.float64).reshape(-1, 2) for ring in (polygon, *holes)]
+    xs = np.unique(np.concatenate([ring[:, 0] for ring in rings]))
+    ys = np.unique(np.concatenate([ring[:, 1] for ring in rings]))
+    return _inside_cells(rings, xs, ys), xs, ys
+
+
+def random_case(rng, max_cells=16, max_vertices=200):
+    """
+    Випадковий ізотетичний полігон як маска клітинок з координатами меж (cells, xs, ys).
+
+    Здебільшого - випадкова маска з нерівномірними кроками сітки (часто з
+    отворами та вирівняними ребрами), інколи - малий полігон з generators.py.
+    """
+    if rng.random() < 0.25:
+        family = _FAMILIES[rng.integers(len(_FAMILIES))]
+        result = family(int(rng.integers(8, max_vertices + 1)), seed=int(rng.integers(2 ** 32)))
+        polygon, holes = result if isinstance(result, tuple) else (result, ())
+        cells, xs, ys = polygon_to_cells(polygon, holes)
+    else:
+        rows, cols = rng.integers(1, max_cells + 1, size=2)
+        cells = rng.random((rows, cols)) < rng.uniform(0.3, 0.9)
+        xs = int(rng.integers(-1000, 1000)) + np.concatenate(([0], np.cumsum(rng.integers(1, 50, cols))))
+        ys = int(rng.integers(-1000, 1000)) + np.concatenate(([0], np.cumsum(rng.integers(1, 50, rows))))
+    cells = normalize_cells(cells)
+    if cells is None:
+        cells = np.ones((1, 1), dtype=bool)
+    return cells, xs.tolist(), ys.tolist()
+
+
+def run_engine(engine, polygon, holes):
+    """Запускає рушій без його службового виводу і повертає (прямокутники, помилка)."""
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            rectangles = ENGINES[engine](polygon, holes)
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+    return rectangles, check_coverage(polygon, holes, rectangles)
+
+
+def shrink_case(engine, cells, xs, ys, max_checks=2000):
+    """
+    Зменшує вхід, на якому рушій помиляється: видаляє рядки та стовпці сітки,
+    потім окремі клітинки, потім замінює координати на одиничні кроки.
+    Зміна приймається, лише якщо рушій і далі помиляється.
+    """
+    checks = 0
+
+    def fails(candidate, cxs, cys):
+        nonlocal checks
+        checks += 1
+        polygon, holes = cells_to_rings(candidate, cxs, cys)
+        return run_engine(engine, polygon, holes)[1] is not None
+
+    def attempts(cells, xs, ys):
+        rows, cols = cells.shape
+        for k in range(rows):
+            yield np.delete(cells, k, axis=0), xs, ys[:k + 1] + ys[k + 2:]
+        for i in range(cols):
+            yield np.delete(cells, i, axis=1), xs[:i + 1] + xs[i + 2:], ys
+        for k, i in zip(*np.nonzero(cells)):
+            candidate = cells.copy()
+            candidate[k, i] = False
+            yield candidate, xs, ys
+        yield cells, list(range(cols + 1)), list(range(rows + 1))
+
+    changed = True
+    while changed and checks < max_checks:
+        changed = False
+        for candidate, cxs, cys in attempts(cells, xs, ys):
+            if checks >= max_checks:
+                break
+            candidate = normalize_cells(candidate)
+            if candidate is None or (candidate.shape == cells.shape and (candidate == cells).all()
+                                     and (cxs, cys) == (xs, ys)):
+                continue
+            if fails(candidate, cxs, cys):
+                cells, xs, ys = candidate, cxs, cys
+                changed = True
+                break
+    return cells, xs, ys
+
+
+def write_repro(filename, engine, polygon, holes):
+    """
+    Записує мінімальний приклад у форматі експорту GridView: полігон і хибні
+    прямокутники рушія. JSON не має отворів, тож для полігону з отворами поряд
+    пишеться ще й .polybin з тими самими даними.
+    """
+    rectangles, _ = run_engine(engine, polygon, holes)
+    write_project_json(filename, polygon, rectangles)
+    if holes:
+        write_project_binary(os.path.splitext(filename)[0] + '.polybin', polygon, rectangles, holes=holes)
+
+
+def fuzz(cases=300, seed=0, engines=None, out_dir='fuzz_failures', shrink=True, max_cells=16, max_vertices=200):
+    """
+    Диференційне тестування рушіїв розбивки на seeded випадкових полігонах.
+
+    Кожен випадок k будується з генератора default_rng([seed, k]), тож його можна
+    відтворити окремо. Для кожної пари (випадок, рушій) з помилкою вхід
+    зменшується і записується у out_dir як <рушій>_seed<seed>_case<k>.json.
+
+    Returns:
+        List[dict]: Знайдені помилки з полями case, engine, error, vertices, file
+    """
+    engines = list(engines or DEFAULT_ENGINES)
+    failures = []
+    for case in range(cases):
+        rng = np.random.default_rng([seed, case])
+        cells, xs, ys = random_case(rng, max_cells, max_vertices)
+        polygon, holes = cells_to_rings(cells, xs, ys)
+        for engine in engines:
+            _, error = run_engine(engine, polygon, holes)
+            if error is None:
+                continue
+            small_polygon, small_holes = polygon, holes
+            if shrink:
+                small_polygon, small_holes = cells_to_rings(*shrink_case(engine, cells, xs, ys))
+            os.makedirs(out_dir, exist_ok=True)
+            filename = os.path.join(out_dir, f"{engine}_seed{seed}_case{case}.json")
+            write_repro(filename, engine, small_polygon, small_holes)
+            failures.append({
+                'case': case,
+                'engine': engine,
+                'error': run_engine(engine, small_polygon, small_holes)[1] or error,
+                'vertices': len(small_polygon) + sum(len(hole) for hole in small_holes),
+                'file': filename,
+            })
+    return failures
+
+
+def replay(filename, engines=None):
+    """Проганяє рушії на збереженому проєкті (JSON або .polybin) і повертає {рушій: помилка}."""
+    polygon, holes, _, _ = load_project(filename)
+    polygon = [tuple(p) for p in polygon.tolist()]
+    holes = [[tuple(p) for p in np.asarray(hole).tolist()] for hole in holes]
+    return {engine: run_engine(engine, polygon, holes)[1] for engine in (engines or DEFAULT_ENGINES)}
+
+
+if __name__ == "__main__":
+    # python fuzz.py [--cases N] [--seed S] [--engines a,b] [--out dir] [--no-shrink] [--replay file ...]
+    parser = argparse.ArgumentParser(description="Differential fuzzing of decomposition engines")
+    parser.add_argument('--cases', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engines', default=','.join(DEFAULT_ENGINES),
+                        help=f"comma-separated subset of: {', '.join(ENGINES)}")
+    parser.add_argument('--out', default='fuzz_failures')
+    parser.add_argument('--no-shrink', action='store_true')
+    parser.add_argument('--max-cells', type=int, default=16)
+    parser.add_argument('--max-vertices', type=int, default=200)
+    parser.add_argument('--replay', nargs='+', metavar='FILE')
+    args = parser.parse_args()
+
+    engines = [name for name in args.engines.split(',') if name]
+    unknown = [name for name in engines if name not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(unknown)}")
+
+    if args.replay:
+        failed = False
+        for filename in args.replay:
+            for engine, error in replay(filename, engines).items():
+                print(f"{filename} {engine}: {error or 'ok'}")
+                failed = failed or error is not None
+        sys.exit(1 if failed else 0)
+
+    start = time.time()
+    failures = fuzz(args.cases, args.seed, engines, args.out, not args.no_shrink, args.max_cells, args.max_vertices)
+    for failure in failures:
+        print(f"case {failure['case']} {failure['engine']}: {failure['error']} "
+              f"({failure['vertices']} vertices) -> {failure['file']}")
+    print(f"{args.cases} cases x {len(engines)} engines, {len(failures)} failures, "
+          f"{time.time() - start:.1f}s")
+    sys.exit(1 if failures else 0)
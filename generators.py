@@ -0,0 +1,194 @@
+import numpy as np
+
+
+def _positive(rng, size, low, high):
+    """Випадкові цілі кроки у діапазоні [low, high]."""
+    return rng.integers(low, high + 1, size=size, dtype=np.int64)
+
+
+def _skyline(widths, heights):
+    """
+    Будує полігон-«горизонт»: нижнє ребро на y=0 і ступінчасту верхню межу.
+
+    Сусідні висоти мають відрізнятися, тоді всі вершини різні і полігон простий.
+    """
+    m = len(heights)
+    xs = np.concatenate(([0], np.cumsum(widths)))
+    points = np.empty((2 * m + 2, 2), dtype=np.int64)
+    points[0] = (0, 0)
+    points[1] = (xs[-1], 0)
+
+    # Верхня межа справа наліво: (X[j+1], H[j]), (X[j], H[j])
+    j = np.arange(m - 1, -1, -1)
+    top = points[2:]
+    top[0::2, 0] = xs[j + 1]
+    top[0::2, 1] = heights[j]
+    top[1::2, 0] = xs[j]
+    top[1::2, 1] = heights[j]
+    return points
+
+
+def generate_comb_polygon(num_vertices=10000, seed=None, tooth_width=(10, 40), tooth_height=(20, 200), base=10):
+    """
+    Генерує «гребінець»: основа товщиною base з зубцями випадкової висоти.
+
+    Args:
+        num_vertices: Приблизна кількість вершин
+        seed: Зерно генератора випадкових чисел
+        tooth_width: Діапазон ширини зубців та проміжків
+        tooth_height: Діапазон висоти зубців над основою
+        base: Товщина основи
+
+    Returns:
+        np.ndarray: Масив вершин (n, 2) типу int64
+    """
+    rng = np.random.default_rng(seed)
+    teeth = max(1, (num_vertices - 4) // 4)
+    m = 2 * teeth + 1  # проміжок, зубець, проміжок, ..., проміжок
+    widths = _positive(rng, m, *tooth_width)
+    heights = np.full(m, base, dtype=np.int64)
+    heights[1::2] += _positive(rng, teeth, *tooth_height)
+    return _skyline(widths, heights)
+
+
+def generate_staircase_polygon(num_vertices=10000, seed=None, step=(1, 50)):
+    """
+    Генерує «сходи»: верхня межа монотонно спадає зліва направо.
+
+    Args:
+        num_vertices: Приблизна кількість вершин
+        seed: Зерно генератора випадкових чисел
+        step: Діапазон ширини та висоти сходинок
+
+    Returns:
+        np.ndarray: Масив вершин (n, 2) типу int64
+    """
+    rng = np.random.default_rng(seed)
+    m = max(1, (num_vertices - 2) // 2)
+    widths = _positive(rng, m, *step)
+    heights = np.cumsum(_positive(rng, m, *step))[::-1]
+    return _skyline(widths, heights)
+
+
+def generate_orthoconvex_polygon(num_vertices=10000, seed=None, step=(1, 50)):
+    """
+    Генерує випадковий ортогонально опуклий полігон: перетин з будь-якою
+    горизонтальною чи вертикальною прямою є одним відрізком.
+
+    Полігон складається з рядків [L_j, R_j] x [y_j, y_{j+1}], де L_j < 0 < R_j,
+    R спершу строго зростає, потім строго спадає, а L - навпаки.
+
+    Args:
+        num_vertices: Приблизна кількість вершин (кратна 4)
+        seed: Зерно генератора випадкових чисел
+        step: Діапазон кроків по X та Y
+
+    Returns:
+        np.ndarray: Масив вершин (n, 2) типу int64
+    """
+    rng = np.random.default_rng(seed)
+    k = max(1, num_vertices // 4)
+    ys = np.concatenate(([0], np.cumsum(_positive(rng, k, *step))))
+
+    def unimodal():
+        peak = int(rng.integers(0, k))
+        rise = np.cumsum(_positive(rng, peak + 1, *step))
+        fall = np.cumsum(_positive(rng, k - peak - 1, *step))[::-1]
+        if len(fall):
+            rise[-1] = max(rise[-1], fall[0] + 1)
+        return np.concatenate((rise, fall))
+
+    right = unimodal()
+    left = -unimodal()
+
+    points = np.empty((4 * k, 2), dtype=np.int64)
+    # Права межа знизу вгору
+    points[0:2 * k:2, 0] = right
+    points[0:2 * k:2, 1] = ys[:-1]
+    points[1:2 * k:2, 0] = right
+    points[1:2 * k:2, 1] = ys[1:]
+    # Ліва межа згори вниз
+    points[2 * k::2, 0] = left[::-1]
+    points[2 * k::2, 1] = ys[:0:-1]
+    points[2 * k + 1::2, 0] = left[::-1]
+    points[2 * k + 1::2, 1] = ys[-2::-1]
+    return points
+
+
+def generate_spiral_polygon(num_vertices=10000, seed=None, width=(2, 20)):
+    """
+    Генерує прямокутну спіраль - коридор товщиною 2h, закручений проти годинникової стрілки.
+
+    Осьова лінія має довжини сегментів s, s, 2s, 2s, 3s, ... (s = 4h), тому сусідні
+    паралельні витки віддалені на s > 2h і не перетинаються.
+
+    Args:
+        num_vertices: Приблизна кількість вершин
+        seed: Зерно генератора випадкових чисел
+        width: Діапазон напівтовщини коридору h
+
+    Returns:
+        np.ndarray: Масив вершин (n, 2) типу int64
+    """
+    rng = np.random.default_rng(seed)
+    h = int(rng.integers(width[0], width[1] + 1))
+    s = 4 * h
+    m = max(1, num_vertices // 2 - 1)  # кількість сегментів осьової лінії
+
+    k = np.arange(m)
+    directions = np.array([(1, 0), (0, 1), (-1, 0), (0, -1)], dtype=np.int64)[k % 4]
+    lengths = s * (k // 2 + 1)
+    centre = np.zeros((m + 1, 2), dtype=np.int64)
+    np.cumsum(directions * lengths[:, None], axis=0, out=centre[1:])
+
+    # Ліва нормаль кожного сегмента та зміщення вершин осьової лінії (мітра на поворотах)
+    normals = np.stack((-directions[:, 1], directions[:, 0]), axis=1)
+    offsets = np.empty((m + 1, 2), dtype=np.int64)
+    offsets[0] = normals[0]
+    offsets[-1] = normals[-1]
+    offsets[1:-1] = normals[:-1] + normals[1:]
+    offsets *= h
+
+    return np.concatenate((centre + offsets, (centre - offsets)[::-1]))
+
+
+def generate_polygon_with_holes(num_vertices=10000, seed=None, cell=100, margin=10):
+    """
+    Генерує прямокутник з прямокутними отворами випадкового розміру,
+    по одному отвору в кожній клітинці сітки.
+
+    Args:
+        num_vertices: Приблизна кількість вершин (4 на отвір)
+        seed: Зерно генератора випадкових чисел
+        cell: Розмір клітинки сітки
+        margin: Мінімальний відступ отвору від меж клітинки
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Зовнішній контур (4, 2) та отвори (h, 4, 2)
+    """
+    rng = np.random.default_rng(seed)
+    count = max(1, num_vertices // 4 - 1)
+    cols = int(np.ceil(np.sqrt(count)))
+    rows = -(-count // cols)
+
+    outer = np.array([(0, 0), (cols * cell + 2 * margin, 0),
+                      (cols * cell + 2 * margin, rows * cell + 2 * margin), (0, rows * cell + 2 * margin)],
+                     dtype=np.int64)
+
+    idx = np.arange(count)
+    x0 = margin + (idx % cols) * cell
+    y0 = margin + (idx // cols) * cell
+    half = cell // 2
+    left = x0 + _positive(rng, count, margin, half - 1)
+    right = x0 + _positive(rng, count, half + 1, cell - margin)
+    bottom = y0 + _positive(rng, count, margin, half - 1)
+    top = y0 + _positive(rng, count, half + 1, cell - margin)
+
+    # Отвори обходяться за годинниковою стрілкою
+    holes = np.stack((
+        np.stack((left, bottom), axis=1),
+        np.stack((left, top), axis=1),
+        np.stack((right, top), axis=1),
+        np.stack((right, bottom), axis=1),
+    ), axis=1)
+    return outer, holes
@@ -2,13 +2,19 @@ import time
 import random
 import math
 import math
-import json
 from typing import List, Tuple
 from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QLabel
 from PySide6.QtCore import Qt, QPointF, QRectF, Signal
 from PySide6.QtGui import QPen, QBrush, QColor, QPainter, QFont, QPolygonF
-from collections import defaultdict
-from utils import decompose_polygon_sweep, generate_large_isothetic_polygon
+from collections import defaultdict, OrderedDict
+from utils import generate_large_isothetic_polygon
+from tiles import export_tiles, RECT_COLORS, RECT_PEN_COLOR, POLYGON_PEN_COLOR
+from snapping import SnapIndex
+from document import PolygonDocument
+from project_io import (write_project_json, iter_project_json, write_project_binary,
+                        read_project_binary, is_binary_project, BINARY_EXTENSION)
+from generators import (generate_comb_polygon, generate_staircase_polygon,
+                        generate_orthoconvex_polygon, generate_spiral_polygon)
 
 def is_horizontal(p1, p2):
     return abs(p1[1] - p2[1]) < 0.001
@@ -42,8 +48,13 @@ class GridView(QGraphicsView):
         self.polygon_points = []  # List of QPointF for polygon vertices
         self.current_polygon = None  # Will be a QGraphicsPolygonItem
         self.point_items = []  # List to keep track of point markers
-        self.finished_polygon = None  # The completed polygon
-        self.decomposition_rectangles = []  # Store decomposition rectangles
+        self.finished_polygon = None  # The most recently completed polygon
+        self.finished_id = None  # Its id in the document
+        
+        # Finished polygons are painted straight from the document, only those in the exposed rect
+        self.document = PolygonDocument()
+        self.show_decomposition = False  # Paint decomposition rectangles of visible polygons
+        self.polygon_shapes = OrderedDict()  # LRU cache of QPolygonF for visible polygons
         
         # Create scene with generous bounds
         self.scene = QGraphicsScene(self)
@@ -112,6 +123,10 @@ class GridView(QGraphicsView):
         self.highlight_radius = 5  # Radius of the green highlight circle
         self.highlight_nearest = False  # Whether to show the highlight
         self.highlight_max_distance = 30  # Maximum pixel distance to show highlight
+        
+        # Spatial index over polygon vertices and edges for snapping
+        self.snap_index = SnapIndex()
+        self.snap_max_cells = 2  # Skip feature snapping when the snap radius spans more cells than this
 
         # Initial view
         self.centerOn(0, 0)
@@ -147,6 +162,15 @@ class GridView(QGraphicsView):
         grid_y = round(scene_pos.y() / grid_size) * grid_size
         return QPointF(grid_x, grid_y)
     
+    def find_nearest_snap_point(self, scene_pos):
+        """Snap to the nearest polygon vertex or edge within the highlight radius, else to the grid"""
+        radius = self.highlight_max_distance / self.transform().m11()
+        if self.snap_index and radius <= self.snap_index.cell_size * self.snap_max_cells:
+            snap = self.snap_index.nearest(scene_pos.x(), scene_pos.y(), radius)
+            if snap:
+                return QPointF(snap[0], snap[1])
+        return self.find_nearest_grid_point(scene_pos)
+    
     def drawForeground(self, painter, rect):
         """Draw foreground elements including the green highlight dot"""
         super().drawForeground(painter, rect)
@@ -207,9 +231,52 @@ class GridView(QGraphicsView):
         painter.drawLine(0, top, 0, bottom)
         painter.drawLine(left, 0, right, 0)
         
+        self.draw_document(painter, rect)
+        
         self.grid_info_label.setText(f"Grid: {effective_grid_size:.1f}px | Scale: {current_scale:.4f}x")
         self.grid_info_label.adjustSize()
     
+    def polygon_shape(self, polygon_id):
+        """QPolygonF rings (outline and holes) for a document polygon, built on first paint and kept in an LRU cache"""
+        shape = self.polygon_shapes.get(polygon_id)
+        if shape is None:
+            rings = [self.document.polygons[polygon_id], *self.document.holes.get(polygon_id, ())]
+            shape = [QPolygonF([QPointF(x, y) for x, y in ring]) for ring in rings]
+            self.polygon_shapes[polygon_id] = shape
+            while len(self.polygon_shapes) > self.document.max_cached:
+                self.polygon_shapes.popitem(last=False)
+        else:
+            self.polygon_shapes.move_to_end(polygon_id)
+        return shape
+    
+    def draw_document(self, painter, rect):
+        """Paint finished polygons (and their decompositions) whose bounds intersect the exposed rect"""
+        visible = self.document.query(rect.left(), rect.top(), rect.right(), rect.bottom())
+        if not visible:
+            return
+        
+        current_scale = self.transform().m11()
+        painter.setPen(QPen(POLYGON_PEN_COLOR, 3 / current_scale))
+        painter.setBrush(Qt.NoBrush)
+        for polygon_id in visible:
+            for ring in self.polygon_shape(polygon_id):
+                painter.drawPolygon(ring)
+        
+        # With more visible polygons than the decomposition cache holds, every repaint would
+        # evict and decompose them all again, so zoomed that far out only outlines are painted
+        if self.show_decomposition and len(visible) <= self.document.max_cached:
+            painter.setPen(QPen(RECT_PEN_COLOR, 2 / current_scale))
+            for polygon_id in visible:
+                # Decomposed lazily, the first time the polygon becomes visible; only rectangles
+                # in the exposed rect are drawn, one drawRects call per colour as in tiles.py
+                rects, ids = self.document.visible_rectangles(
+                    polygon_id, rect.left(), rect.top(), rect.right(), rect.bottom())
+                for c, color in enumerate(RECT_COLORS):
+                    group = rects[ids % len(RECT_COLORS) == c]
+                    if len(group):
+                        painter.setBrush(QBrush(color))
+                        painter.drawRects([QRectF(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in group.tolist()])
+    
     def mouseMoveEvent(self, event):
         """Handle mouse move events"""
         scene_pos = self.mapToScene(event.pos())
@@ -221,7 +288,7 @@ class GridView(QGraphicsView):
         if abs(scene_pos.y()) < adjusted_threshold:
             scene_pos.setY(0)
         
-        self.nearest_grid_point = self.find_nearest_grid_point(scene_pos)
+        self.nearest_grid_point = self.find_nearest_snap_point(scene_pos)
         nearest_point_in_view = self.mapFromScene(self.nearest_grid_point)
         mouse_pos_in_view = event.pos()
         dx = nearest_point_in_view.x() - mouse_pos_in_view.x()
@@ -282,6 +349,7 @@ class GridView(QGraphicsView):
         """Remove the last added point"""
         if self.polygon_points:
             removed_point = self.polygon_points.pop()
+            self.snap_index.pop()
             if self.point_items:
                 last_marker = self.point_items.pop()
                 self.scene.removeItem(last_marker)
@@ -312,11 +380,6 @@ class GridView(QGraphicsView):
     
     def add_polygon_point(self, x, y):
         """Add a point to the current polygon with isothetic validation"""
-        # Check if polygon is already finished
-        if self.finished_polygon is not None:
-            self.toast.emit("Polygon already finished. Clear to start a new one.")
-            return False
-            
         new_point = QPointF(x, y)
         
         if self.polygon_points:
@@ -326,6 +389,8 @@ class GridView(QGraphicsView):
                 print(f"Invalid point: ({x}, {y}) - not horizontal or vertical from last point")
                 return False
         
+        # The first point starts a new ring in the snap index
+        self.snap_index.append(x, y, connect=bool(self.polygon_points))
         self.polygon_points.append(new_point)
         point_marker = self.scene.addEllipse(
             x - 5/self.transform().m11(), 
@@ -340,8 +405,8 @@ class GridView(QGraphicsView):
         print(f"Added point: ({x}, {y})")
         return True
     
-    def finalize_polygon(self):
-        """Finalize the current polygon"""
+    def finalize_polygon(self, holes=()):
+        """Finalize the current polygon, optionally with hole rings from an imported project"""
         if len(self.polygon_points) < 3:
             self.toast.emit("Polygon must have at least 3 points")
             print("Cannot finalize polygon: must have at least 3 points")
@@ -354,24 +419,22 @@ class GridView(QGraphicsView):
             print("Cannot finalize polygon: last point must match the starting point")
             return
         
-        # Store the finished polygon
+        # Store the finished polygon in the document; it is painted from there
         self.finished_polygon = [QPointF(p) for p in self.polygon_points[:-1]]  # Remove duplicate closing point
+        self.finished_id = self.document.add(((p.x(), p.y()) for p in self.finished_polygon), holes=holes)
+        for hole in holes:
+            self.snap_index.extend(hole, closed=True)
         
-        # Update visual representation
         if self.current_polygon:
             self.scene.removeItem(self.current_polygon)
-            poly = QPolygonF(self.finished_polygon)
-            self.current_polygon = self.scene.addPolygon(
-                poly,
-                QPen(QColor(0, 150, 0, 255), 3/self.transform().m11()),
-                # QBrush(QColor(0, 255, 0, 100))
-            )
+            self.current_polygon = None
         
-        # Clear point markers and working polygon
+        # Clear point markers and working polygon, so the next click starts a new polygon
         for marker in self.point_items:
             self.scene.removeItem(marker)
         self.point_items = []
         self.polygon_points = []
+        self.viewport().update()
         
         self.toast.emit("Polygon finalized! Use 'Decompose to Rectangles' to see the breakdown.")
         print("Polygon finalized")
@@ -383,60 +446,35 @@ class GridView(QGraphicsView):
         # Скидаємо лише змінні
         self.point_items.clear()
         self.polygon_points.clear()
-        self.decomposition_rectangles.clear()
+        self.snap_index.clear()
+        self.document.clear()
+        self.polygon_shapes.clear()
+        self.show_decomposition = False
         self.current_polygon = None
         self.finished_polygon = None
+        self.finished_id = None
 
         self.toast.emit("Polygon cleared")
         print("Polygon cleared")
     
-    def decompose_polygon(self):
+    def decompose_polygon(self, rectangles=None):
         start = round(time.time() * 1000)
-        """Decompose the finished polygon into rectangles"""
+        """Decompose the finished polygon into rectangles (or show precomputed ones)"""
         if self.finished_polygon is None:
             self.toast.emit("No finished polygon to decompose. Finish a polygon first.")
             return
         
-        # Clear previous decomposition
-        for rect_item in self.decomposition_rectangles:
-            self.scene.removeItem(rect_item)
-        self.decomposition_rectangles.clear()
-        
-        # Convert QPointF to tuples for the algorithm
-        polygon_tuples = [(p.x(), p.y()) for p in self.finished_polygon]
-        
-        # Apply decomposition algorithm
+        # Apply decomposition algorithm to the latest polygon; the others are decomposed when painted
         try:
-            # rectangles = decompose_polygon(polygon_tuples)
-            rectangles = decompose_polygon_sweep(polygon_tuples)
+            if rectangles is not None:
+                self.document.store_decomposition(self.finished_id, rectangles)
+            rectangles = self.document.decomposition(self.finished_id)
+            self.show_decomposition = True
+            self.viewport().update()
             
-            if rectangles:
-                # Visualize rectangles
-                for i, ((x1, y1), (x2, y2)) in enumerate(rectangles):
-                    rect = QRectF(x1, y1, x2 - x1, y2 - y1)
-                    
-                    # Different colors for each rectangle
-                    colors = [
-                        QColor(255, 100, 100, 150),  # Light red
-                        QColor(100, 255, 100, 150),  # Light green
-                        QColor(100, 100, 255, 150),  # Light blue
-                        QColor(255, 255, 100, 150),  # Light yellow
-                        QColor(255, 100, 255, 150),  # Light magenta
-                        QColor(100, 255, 255, 150),  # Light cyan
-                    ]
-                    
-                    color = colors[i % len(colors)]
-                    
-                    rect_item = self.scene.addRect(
-                        rect,
-                        QPen(QColor(0, 0, 0, 200), 2/self.transform().m11()),
-                        QBrush(color)
-                    )
-                    self.decomposition_rectangles.append(rect_item)
-                
+            if len(rectangles):
                 self.toast.emit(f"Decomposed into {len(rectangles)} rectangles")
                 print(f"Decomposed polygon into {len(rectangles)} rectangles")
-                # print(rectangles)
             else:
                 self.toast.emit("No rectangles found in decomposition")
                 print("No rectangles found in decomposition")
@@ -447,7 +485,7 @@ class GridView(QGraphicsView):
     
 
     def generate_large_polygon(self):
-        """Генерує один ізотетичний багатокутник з приблизно 10 000 вершин."""
+        """Генерує один простий ізотетичний багатокутник з приблизно 1 000 вершин."""
         self.clear_polygon()
 
         # Параметри
@@ -455,31 +493,22 @@ class GridView(QGraphicsView):
         grid_size = self.get_adaptive_grid_size()
         start_x = round(random.uniform(-1000, 1000) / grid_size) * grid_size
         start_y = round(random.uniform(-1000, 1000) / grid_size) * grid_size
-        current_x, current_y = start_x, start_y
-        is_horizontal = random.choice([True, False])
-        points = [QPointF(current_x, current_y)]
 
-        for _ in range(num_vertices - 1):
-            step = random.uniform(grid_size * 2, grid_size * 5)
-            if is_horizontal:
-                current_x += random.choice([-step, step])
-                current_x = round(current_x / grid_size) * grid_size
-            else:
-                current_y += random.choice([-step, step])
-                current_y = round(current_y / grid_size) * grid_size
-            points.append(QPointF(current_x, current_y))
-            is_horizontal = not is_horizontal
+        # Генератори з generators.py завжди дають простий багатокутник
+        generator = random.choice([
+            generate_comb_polygon,
+            generate_staircase_polygon,
+            generate_orthoconvex_polygon,
+            generate_spiral_polygon,
+        ])
+        vertices = generator(num_vertices, seed=random.randrange(2**32))
+        points = [QPointF(start_x + x, start_y + y) for x, y in vertices.tolist()]
 
         # Замикання багатокутника
-        if abs(current_x - start_x) < 0.001:
-            points.append(QPointF(start_x, start_y))
-        elif abs(current_y - start_y) < 0.001:
-            points.append(QPointF(start_x, start_y))
-        else:
-            points.append(QPointF(current_x, start_y))
-            points.append(QPointF(start_x, start_y))
+        points.append(QPointF(points[0]))
 
         self.polygon_points = points
+        self.snap_index.build((p.x(), p.y()) for p in points)
         self.update_polygon()
         self.finalize_polygon()
 
@@ -488,42 +517,73 @@ class GridView(QGraphicsView):
         self.viewport().update()
 
 
-    def export_data(self, filename):
+    def export_data(self, filename, compact=False):
         """Export polygon and decomposition data to JSON file"""
-        data = {
-            "polygon": [],
-            "rectangles": []
-        }
+        if len(self.document) > 1:
+            raise ValueError(f"Export holds a single polygon, the scene has {len(self.document)}")
         
-        if self.finished_polygon:
-            data["polygon"] = [(p.x(), p.y()) for p in self.finished_polygon]
+        polygon_tuples = []
+        rectangles = []
+        holes = []
         
-        # Export rectangle data if decomposition exists
-        if self.decomposition_rectangles:
+        if self.finished_polygon:
             polygon_tuples = [(p.x(), p.y()) for p in self.finished_polygon]
-            rectangles = decompose_polygon_sweep(polygon_tuples)
-            data["rectangles"] = [{"top_left": [x1, y1], "bottom_right": [x2, y2]} 
-                                for (x1, y1), (x2, y2) in rectangles]
+            holes = self.document.holes.get(self.finished_id, [])
+        
+        # Export rectangle data if decomposition is shown
+        if self.finished_polygon and self.show_decomposition:
+            rectangles = self.document.decomposition(self.finished_id)
         
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+        if filename.endswith(BINARY_EXTENSION):
+            # Binary project also stores the point-location index
+            write_project_binary(filename, polygon_tuples, rectangles, holes=holes)
+        elif holes:
+            raise ValueError(f"JSON has no holes; export as {BINARY_EXTENSION} instead")
+        else:
+            # Rows are streamed to the file instead of building the whole dict
+            write_project_json(filename, polygon_tuples, rectangles, compact=compact)
         
         print(f"Data exported to {filename}")
 
+    def export_image(self, directory, size=20000):
+        """Export polygon and decomposition as PNG tiles rendered offscreen"""
+        if not self.finished_polygon:
+            raise ValueError("No finished polygon to export")
+        if len(self.document) > 1:
+            raise ValueError(f"Image export holds a single polygon, the scene has {len(self.document)}")
+
+        polygon_tuples = [(p.x(), p.y()) for p in self.finished_polygon]
+        holes = self.document.holes.get(self.finished_id, [])
+        rectangles = self.document.decomposition(self.finished_id) if self.show_decomposition else []
+        rows, cols = export_tiles(directory, polygon_tuples, rectangles, holes=holes, size=size)
+
+        print(f"Image exported to {directory} as {rows}x{cols} tiles")
+
     def import_data(self, filename):
-        """Import polygon data from JSON file"""
+        """Import polygon data from JSON or binary project file"""
+        if is_binary_project(filename):
+            return self.import_binary(filename)
+        
         try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
+            # Read vertex chunks; only the presence of rectangles matters, so stop at the first chunk
+            polygon_chunks = []
+            has_rectangles = False
+            for section, rows in iter_project_json(filename):
+                if section == "polygon":
+                    polygon_chunks.append(rows)
+                else:
+                    has_rectangles = True
+                    if polygon_chunks:
+                        break
             
-            if "polygon" not in data or not data["polygon"]:
+            if not polygon_chunks:
                 raise ValueError("No polygon data found in file")
             
             # Clear existing data
             self.clear_polygon()
             
             # Import polygon points
-            polygon_points = data["polygon"]
+            polygon_points = [point for rows in polygon_chunks for point in rows.tolist()]
             for x, y in polygon_points:
                 self.add_polygon_point(x, y)
             
@@ -536,10 +596,37 @@ class GridView(QGraphicsView):
             self.finalize_polygon()
             
             # If rectangles data exists, show decomposition
-            if "rectangles" in data and data["rectangles"]:
+            if has_rectangles:
                 self.decompose_polygon()
             
             print(f"Data imported from {filename}")
             
+        except Exception as e:
+            raise Exception(f"Import failed: {str(e)}")
+
+    def import_binary(self, filename):
+        """Import polygon and stored decomposition from a memory-mapped binary project"""
+        try:
+            # The mapping is released even if the import fails halfway
+            with read_project_binary(filename) as project:
+                if not len(project.polygon):
+                    raise ValueError("No polygon data found in file")
+                
+                self.clear_polygon()
+                
+                # Set the vertices directly and show the stored rectangles instead of re-running the sweep
+                points = [QPointF(x, y) for x, y in project.polygon.tolist()]
+                points.append(QPointF(points[0]))
+                self.polygon_points = points
+                self.snap_index.build((p.x(), p.y()) for p in points)
+                self.update_polygon()
+                self.finalize_polygon([hole.tolist() for hole in project.holes])
+                
+                # The (r, 4) view over the mapping is kept as is; converting it to tuples would copy every rectangle
+                if len(project.rectangles):
+                    self.decompose_polygon(project.rectangles)
+            
+            print(f"Data imported from {filename}")
+            
         except Exception as e:
             raise Exception(f"Import failed: {str(e)}")
\ No newline at end of file
@@ -53,6 +53,10 @@ class MainWindow(QMainWindow):
         self.export_button = QPushButton('Export')
         self.export_button.clicked.connect(self.export_data)
         
+        # Add "Export Image" button
+        self.export_image_button = QPushButton('Export Image')
+        self.export_image_button.clicked.connect(self.export_image)
+        
         # Add "Import" button
         self.import_button = QPushButton('Import')
         self.import_button.clicked.connect(self.import_data)
@@ -75,6 +79,7 @@ class MainWindow(QMainWindow):
         self.controls_layout.addWidget(self.finish_button)
         self.controls_layout.addWidget(self.decompose_button)
         self.controls_layout.addWidget(self.export_button)
+        self.controls_layout.addWidget(self.export_image_button)
         self.controls_layout.addWidget(self.import_button)
         self.controls_layout.addWidget(self.generate_button)
         self.controls_layout.addWidget(self.help_button)
@@ -135,8 +140,8 @@ class MainWindow(QMainWindow):
         self.grid_view.finalize_polygon()
     
     def export_data(self):
-        """Export polygon and decomposition to a JSON file"""
-        file_name, _ = QFileDialog.getSaveFileName(self, "Export Data", "", "JSON Files (*.json)")
+        """Export polygon and decomposition to a JSON or binary project file"""
+        file_name, _ = QFileDialog.getSaveFileName(self, "Export Data", "", "JSON Files (*.json);;Binary Project (*.polybin)")
         if file_name:
             try:
                 self.grid_view.export_data(file_name)
@@ -144,9 +149,19 @@ class MainWindow(QMainWindow):
             except Exception as e:
                 self.show_toast(f"Export failed: {str(e)}")
     
+    def export_image(self):
+        """Export polygon and decomposition as high-resolution PNG tiles"""
+        directory = QFileDialog.getExistingDirectory(self, "Export Image")
+        if directory:
+            try:
+                self.grid_view.export_image(directory)
+                self.show_toast("Image exported successfully")
+            except Exception as e:
+                self.show_toast(f"Export failed: {str(e)}")
+    
     def import_data(self):
-        """Import polygon from a JSON file"""
-        file_name, _ = QFileDialog.getOpenFileName(self, "Import Data", "", "JSON Files (*.json)")
+        """Import polygon from a JSON or binary project file"""
+        file_name, _ = QFileDialog.getOpenFileName(self, "Import Data", "", "Project Files (*.json *.polybin);;JSON Files (*.json);;Binary Project (*.polybin)")
         if file_name:
             try:
                 self.grid_view.import_data(file_name)
@@ -168,15 +183,16 @@ class MainWindow(QMainWindow):
   <li>Enter x, y coordinates and click "Add Point" to add a point to the polygon</li>
   <li>"Find Point" centers the view on the specified coordinates</li>
   <li>"Remove Last Point" deletes the last added point</li>
-  <li>"Clear Polygon" removes all points and starts over</li>
-  <li>"Finish Polygon" finalizes the current polygon (must have at least 3 points and be closed)</li>
-  <li>"Decompose to Rectangles" breaks down the completed polygon into rectangles</li>
+  <li>"Clear Polygon" removes all polygons and starts over</li>
+  <li>"Finish Polygon" finalizes the current polygon (must have at least 3 points and be closed); the next point starts a new polygon</li>
+  <li>"Decompose to Rectangles" breaks down the completed polygons into rectangles as they come into view</li>
   <li>"Generate Random Polygon" creates a random isothetic polygon for testing</li>
 </ul>
 <p><b>File Operations:</b></p>
 <ul>
-  <li>"Export" saves the polygon and its decomposition to a JSON file</li>
-  <li>"Import" loads polygon data from a JSON file</li>
+  <li>"Export" saves the polygon and its decomposition to a JSON or binary (.polybin) file</li>
+  <li>"Export Image" renders the polygon and its decomposition into 20000px PNG tiles</li>
+  <li>"Import" loads polygon data from a JSON or binary (.polybin) file</li>
 </ul>
 <p><b>Note:</b> Only isothetic polygons (with horizontal and vertical edges) are supported.</p>
 """
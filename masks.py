@@ -0,0 +1,184 @@
+import math
+import numpy as np
+from utils import repeat_ranges
+
+# Починаючи з цієї кількості прямокутників різницевий масив швидший за присвоєння зрізів
+DIFF_THRESHOLD = 2000
+# Бюджет пам'яті на одну смугу в iter_mask_chunks: маска смуги разом із різницевим масивом
+CHUNK_BYTES = 64 << 20
+
+
+def _rect_array(rectangles):
+    """Прямокутники ((x1, y1), (x2, y2)) як масив (r, 4) з упорядкованими межами."""
+    rects = np.asarray(rectangles, dtype=np.float64).reshape(-1, 4)
+    return np.stack((
+        np.minimum(rects[:, 0], rects[:, 2]), np.minimum(rects[:, 1], rects[:, 3]),
+        np.maximum(rects[:, 0], rects[:, 2]), np.maximum(rects[:, 1], rects[:, 3]),
+    ), axis=1)
+
+
+def _grid(rects, bounds, resolution):
+    """Межі сітки (x0, y0) та її розмір (rows, cols)."""
+    if bounds is None:
+        if len(rects) == 0:
+            raise ValueError("Bounds are required for an empty rectangle list")
+        bounds = (rects[:, 0].min(), rects[:, 1].min(), rects[:, 2].max(), rects[:, 3].max())
+    x0, y0, x1, y1 = bounds
+    cols = max(1, math.ceil((x1 - x0) / resolution))
+    rows = max(1, math.ceil((y1 - y0) / resolution))
+    return (x0, y0), (rows, cols)
+
+
+def _cell_ranges(rects, origin, resolution, rows, cols):
+    """
+    Діапазони клітинок [r0, r1) x [c0, c1), центри яких лежать у прямокутниках.
+
+    Межі напіввідкриті, тому сусідні прямокутники не претендують на одну клітинку.
+    """
+    c0 = np.ceil((rects[:, 0] - origin[0]) / resolution - 0.5)
+    c1 = np.ceil((rects[:, 2] - origin[0]) / resolution - 0.5)
+    r0 = np.ceil((rects[:, 1] - origin[1]) / resolution - 0.5)
+    r1 = np.ceil((rects[:, 3] - origin[1]) / resolution - 0.5)
+    c0, c1 = np.clip(c0, 0, cols).astype(np.int64), np.clip(c1, 0, cols).astype(np.int64)
+    r0, r1 = np.clip(r0, 0, rows).astype(np.int64), np.clip(r1, 0, rows).astype(np.int64)
+    return r0, r1, c0, c1
+
+
+def _label_values(count, labels):
+    """Значення для кожного прямокутника: True, індекс + 1 або задані ID."""
+    if labels is None:
+        return None
+    if labels is True:
+        return np.arange(1, count + 1, dtype=np.int64)
+    values = np.asarray(labels, dtype=np.int64)
+    if len(values) != count:
+        raise ValueError("Number of labels must match number of rectangles")
+    return values
+
+
+def _fill(shape, r0, r1, c0, c1, values, method):
+    """Заповнює маску присвоєнням зрізів або двовимірним різницевим масивом."""
+    rows, cols = shape
+    dtype = bool if values is None else np.int64
+    keep = (r1 > r0) & (c1 > c0)
+    r0, r1, c0, c1 = r0[keep], r1[keep], c0[keep], c1[keep]
+    if values is not None:
+        values = values[keep]
+
+    if method == 'auto':
+        method = 'diff' if len(r0) >= DIFF_THRESHOLD else 'slice'
+
+    if method == 'slice':
+        mask = np.zeros(shape, dtype=dtype)
+        fill = values.tolist() if values is not None else [True] * len(r0)
+        for a, b, c, d, v in zip(r0.tolist(), r1.tolist(), c0.tolist(), c1.tolist(), fill):
+            mask[a:b, c:d] = v
+        return mask
+
+    if method != 'diff':
+        raise ValueError(f"Unknown method: {method}")
+
+    # Прямокутники не перетинаються, тому префіксна сума дає мітку або 1 у кожній клітинці.
+    # Накопичуємо одразу в int64, без проміжного float64-масиву bincount
+    weights = np.ones(len(r0), dtype=np.int64) if values is None else values
+    diff = np.zeros((rows + 1, cols + 1), dtype=np.int64)
+    np.add.at(diff, (r0, c0), weights)
+    np.add.at(diff, (r0, c1), -weights)
+    np.add.at(diff, (r1, c0), -weights)
+    np.add.at(diff, (r1, c1), weights)
+    np.cumsum(diff, axis=0, out=diff)
+    np.cumsum(diff, axis=1, out=diff)
+    grid = diff[:rows, :cols]
+    return grid != 0 if values is None else grid
+
+
+def rectangles_to_mask(rectangles, resolution=1.0, bounds=None, labels=None, method='auto'):
+    """
+    Будує маску зайнятості (або сітку міток) з прямокутників розбивки.
+
+    Клітинка (i, j) покриває [x0 + j * resolution, x0 + (j + 1) * resolution) по X
+    і аналогічно по Y; вона належить прямокутнику, якщо в ньому лежить її центр.
+
+    Args:
+        rectangles: Прямокутники ((x1, y1), (x2, y2)) з decompose_polygon_sweep
+        resolution: Розмір клітинки в одиницях сцени
+        bounds: (x0, y0, x1, y1) області маски; за замовчуванням - габарити прямокутників
+        labels: None - булева маска, True - індекс прямокутника + 1, або масив ID
+        method: 'slice', 'diff' або 'auto'
+
+    Returns:
+        np.ndarray: Маска (rows, cols) типу bool або int64 (0 - поза полігоном)
+    """
+    rects = _rect_array(rectangles)
+    origin, shape = _grid(rects, bounds, resolution)
+    values = _label_values(len(rects), labels)
+    r0, r1, c0, c1 = _cell_ranges(rects, origin, resolution, *shape)
+    return _fill(shape, r0, r1, c0, c1, values, method)
+
+
+def _chunk_rows(cols, labels, chunk_bytes):
+    """Кількість рядків смуги, за якої її маска та різницевий масив уміщаються в chunk_bytes."""
+    row_bytes = (cols + 1) * np.dtype(np.int64).itemsize + cols * (1 if labels is None else 8)
+    return max(1, chunk_bytes // row_bytes)
+
+
+def iter_mask_chunks(rectangles, resolution=1.0, bounds=None, labels=None, chunk_rows=None, method='auto',
+                     chunk_bytes=CHUNK_BYTES):
+    """
+    Будує маску смугами рядків для масок, більших за пам'ять.
+
+    Висота смуги - chunk_rows або, за замовчуванням, стільки рядків, щоб маска
+    смуги разом із різницевим масивом займали не більше chunk_bytes.
+
+    Yields:
+        Tuple[int, np.ndarray]: Номер першого рядка смуги та її маска
+    """
+    rects = _rect_array(rectangles)
+    origin, (rows, cols) = _grid(rects, bounds, resolution)
+    values = _label_values(len(rects), labels)
+    r0, r1, c0, c1 = _cell_ranges(rects, origin, resolution, rows, cols)
+    chunk_rows = chunk_rows or _chunk_rows(cols, labels, chunk_bytes)
+    chunks = -(-rows // chunk_rows)
+
+    # Розкладаємо прямокутники по смугах, які вони перетинають, щоб кожна смуга
+    # переглядала лише свої прямокутники
+    ids = np.nonzero((r1 > r0) & (c1 > c0))[0]
+    first = r0[ids] // chunk_rows
+    owner, local = repeat_ranges((r1[ids] - 1) // chunk_rows - first + 1)
+    pair = ids[owner]
+    chunk_of = first[owner] + local
+    order = np.argsort(chunk_of, kind='stable')
+    pair = pair[order]
+    starts = np.searchsorted(chunk_of[order], np.arange(chunks + 1))
+
+    for k in range(chunks):
+        top = k * chunk_rows
+        bottom = min(top + chunk_rows, rows)
+        hit = pair[starts[k]:starts[k + 1]]
+        chunk = _fill(
+            (bottom - top, cols),
+            np.clip(r0[hit], top, bottom) - top, np.clip(r1[hit], top, bottom) - top,
+            c0[hit], c1[hit],
+            None if values is None else values[hit],
+            method,
+        )
+        yield top, chunk
+
+
+def write_mask(filename, rectangles, resolution=1.0, bounds=None, labels=None, chunk_rows=None, method='auto',
+               chunk_bytes=CHUNK_BYTES):
+    """
+    Записує маску у .npy-файл смугами через np.memmap, не тримаючи її в пам'яті цілком.
+
+    Returns:
+        Tuple[int, int]: Розмір маски (rows, cols)
+    """
+    rects = _rect_array(rectangles)
+    _, shape = _grid(rects, bounds, resolution)
+    dtype = bool if labels is None else np.int64
+    mask = np.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=shape)
+    for top, chunk in iter_mask_chunks(rects, resolution, bounds, labels, chunk_rows, method, chunk_bytes):
+        mask[top:top + len(chunk)] = chunk
+    mask.flush()
+    del mask
+    return shape
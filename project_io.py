@@ -0,0 +1,323 @@
+import os
+import mmap
+import struct
+import itertools
+import numpy as np
+from queries import PointLocationIndex
+
+# Кількість рядків, що форматуються та записуються за один раз
+WRITE_BATCH = 65536
+# Розмір блоку читання у символах
+READ_CHUNK = 1 << 20
+
+_WHITESPACE = str.maketrans('', '', ' \t\r\n')
+_PUNCTUATION = str.maketrans('[]{},', '     ')
+_SECTIONS = ('"polygon":[', '"rectangles":[')
+# Кінець секції після видалення пробілів: закриваюча дужка масиву після останнього рядка
+_SECTION_END = {"polygon": ']]', "rectangles": '}]'}
+_ROW_END = {"polygon": ']', "rectangles": '}'}
+
+
+def _batches(rows, width):
+    """Розбиває рядки (масив або ітератор) на пакети списків Python-чисел форми (b, width)."""
+    if isinstance(rows, np.ndarray):
+        rows = rows.reshape(-1, width)
+        for i in range(0, len(rows), WRITE_BATCH):
+            yield rows[i:i + WRITE_BATCH].tolist()
+        return
+    it = iter(rows)
+    while True:
+        batch = list(itertools.islice(it, WRITE_BATCH))
+        if not batch:
+            return
+        yield np.asarray(batch).reshape(-1, width).tolist()
+
+
+def _write_section(f, name, rows, width, row_format, compact):
+    """Записує одну секцію-масив, форматуючи рядки пакетами."""
+    if compact:
+        f.write(f'"{name}":[')
+        separator = ','
+    else:
+        f.write(f'  "{name}": [')
+        separator = ',\n    '
+    first = True
+    for batch in _batches(rows, width):
+        text = separator.join(row_format.format(*row) for row in batch)
+        if first:
+            f.write(text if compact else '\n    ' + text)
+            first = False
+        else:
+            f.write(separator + text)
+    f.write(']' if compact or first else '\n  ]')
+
+
+def write_project_json(filename, polygon, rectangles=(), compact=False):
+    """
+    Потоково записує полігон і прямокутники у формат {"polygon": ..., "rectangles": ...}.
+
+    Рядки можуть надходити з ітератора (наприклад, генератора прямокутників) і
+    записуються пакетами, тож повний словник у пам'яті не будується.
+
+    Args:
+        filename: Шлях до JSON-файлу
+        polygon: Вершини (x, y) - список, масив (n, 2) або ітератор
+        rectangles: Прямокутники ((x1, y1), (x2, y2)) - список, масив або ітератор
+        compact: Без пробілів і переносів; інакше - по одному рядку на вершину/прямокутник
+    """
+    if compact:
+        pair = '[{!r},{!r}]'
+        rect = '{{"top_left":[{!r},{!r}],"bottom_right":[{!r},{!r}]}}'
+    else:
+        pair = '[{!r}, {!r}]'
+        rect = '{{"top_left": [{!r}, {!r}], "bottom_right": [{!r}, {!r}]}}'
+
+    with open(filename, 'w') as f:
+        f.write('{' if compact else '{\n')
+        _write_section(f, "polygon", polygon, 2, pair, compact)
+        f.write(',' if compact else ',\n')
+        _write_section(f, "rectangles", rectangles, 4, rect, compact)
+        f.write('}' if compact else '\n}\n')
+
+
+def _parse_rows(section, text):
+    """Розбирає повні рядки секції у масив (k, 2) для вершин або (k, 4) для прямокутників."""
+    width = 2
+    if section == "rectangles":
+        width = 4
+        first = text.find('"bottom_right"')
+        if first != -1 and first < text.find('"top_left"'):
+            raise ValueError("Rectangle corners must be stored as top_left, bottom_right")
+        text = text.replace('"top_left":', '').replace('"bottom_right":', '')
+    values = np.fromstring(text.translate(_PUNCTUATION), dtype=np.float64, sep=' ')
+    if len(values) % width:
+        raise ValueError(f"Malformed '{section}' data")
+    return values.reshape(-1, width)
+
+
+def iter_project_json(filename, chunk_size=READ_CHUNK):
+    """
+    Потоково читає файл формату {"polygon": ..., "rectangles": ...}.
+
+    Файл читається блоками по chunk_size символів, тому пам'ять не залежить від
+    розміру файлу. Пробіли видаляються одразу при читанні, а числа кожного блоку
+    розбираються одним викликом np.fromstring.
+
+    Yields:
+        Tuple[str, np.ndarray]: ("polygon", масив (k, 2)) або ("rectangles", масив (k, 4)
+        з x1, y1, x2, y2)
+    """
+    with open(filename, 'r') as f:
+        buffer = ''
+        section = None
+        eof = False
+        while True:
+            if section is None:
+                found = [(buffer.find(key), key) for key in _SECTIONS]
+                found = [(pos, key) for pos, key in found if pos != -1]
+                if found:
+                    pos, key = min(found)
+                    section = key[1:key.index('"', 1)]
+                    buffer = buffer[pos + len(key):]
+                    continue
+                # Зберігаємо хвіст, у якому може початися ключ секції
+                buffer = buffer[-len(_SECTIONS[1]):]
+            elif buffer.startswith(']'):
+                buffer = buffer[1:]
+                section = None
+                continue
+            else:
+                end = buffer.find(_SECTION_END[section])
+                cut = end + 1 if end != -1 else buffer.rfind(_ROW_END[section]) + 1
+                if cut:
+                    rows = _parse_rows(section, buffer[:cut])
+                    if len(rows):
+                        yield section, rows
+                    buffer = buffer[cut:]
+                    if end != -1:
+                        continue
+
+            if eof:
+                if section is not None:
+                    raise ValueError(f"Unexpected end of file in '{section}'")
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer += chunk.translate(_WHITESPACE)
+
+
+def read_project_json(filename, chunk_size=READ_CHUNK):
+    """
+    Читає полігон і прямокутники у масиви NumPy через iter_project_json.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Вершини (n, 2) та прямокутники (r, 4)
+    """
+    parts = {"polygon": [np.empty((0, 2))], "rectangles": [np.empty((0, 4))]}
+    for section, rows in iter_project_json(filename, chunk_size):
+        parts[section].append(rows)
+    return np.vstack(parts["polygon"]), np.vstack(parts["rectangles"])
+
+
+# Бінарний формат проєкту:
+#   заголовок: MAGIC, версія (uint32), кількість блоків (uint32), вісь шарів індексу (uint32, 0 - y, 1 - x;
+#   у версії 1 поля немає і шари завжди горизонтальні)
+#   таблиця блоків: ім'я (16 байт), тип ('<f8' або '<i8', 4 байти), зміщення, рядки, стовпці (uint64)
+#   дані блоків: суцільні little-endian масиви, вирівняні на 64 байти
+BINARY_MAGIC = b'POLYPROJ'
+BINARY_VERSION = 2
+BINARY_EXTENSION = '.polybin'
+_HEADER = struct.Struct('<8sIII')
+_HEADER_V1 = struct.Struct('<8sII')
+_AXES = ('y', 'x')
+_BLOCK = struct.Struct('<16s4sQQQ')
+_ALIGN = 64
+
+
+class BinaryProject:
+    """Проєкт, відкритий з бінарного файлу; усі масиви - представлення над mmap без копіювання."""
+
+    def __init__(self, polygon, holes, rectangles, index, mapping=None):
+        self.polygon = polygon          # (n, 2)
+        self.holes = holes              # список (k, 2)
+        self.rectangles = rectangles    # (r, 4): x1, y1, x2, y2
+        self.index = index              # PointLocationIndex або None
+        self._mapping = mapping
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Звільняє відображення файлу; масиви проєкту після цього використовувати не можна.
+
+        Поки хтось тримає представлення над mmap (наприклад, poly = project.polygon),
+        закрити його неможливо - тоді відображення звільнить збирач сміття разом
+        з останнім представленням.
+        """
+        self.polygon = self.holes = self.rectangles = self.index = None
+        if self._mapping is not None:
+            try:
+                self._mapping.close()
+            except BufferError:
+                pass
+            self._mapping = None
+
+
+def write_project_binary(filename, polygon, rectangles=(), holes=(), index=None):
+    """
+    Записує проєкт у бінарний формат, придатний для відкриття через mmap.
+
+    Args:
+        filename: Шлях до файлу
+        polygon: Вершини зовнішнього контуру (n, 2)
+        rectangles: Прямокутники розбивки - ((x1, y1), (x2, y2)) або масив (r, 4)
+        holes: Контури отворів
+        index: PointLocationIndex; якщо None і є прямокутники - будується з них
+    """
+    rings = [np.asarray(ring, dtype='<f8').reshape(-1, 2) for ring in (polygon, *holes)]
+    rects = np.asarray(rectangles, dtype='<f8').reshape(-1, 4)
+    if index is None and len(rects):
+        index = PointLocationIndex.from_rectangles(rects)
+
+    blocks = [
+        ("ring_offsets", np.cumsum([0] + [len(ring) for ring in rings]).astype('<i8')),
+        ("vertices", np.vstack(rings)),
+        ("rectangles", rects),
+    ]
+    if index is not None:
+        blocks += [
+            ("index_ys", index.ys.astype('<f8')),
+            ("index_xs", index.xs.astype('<f8')),
+            ("index_keys", index.keys.astype('<i8')),
+            ("index_x_end", index.x_end.astype('<f8')),
+            ("index_rect_ids", index.rect_ids.astype('<i8')),
+        ]
+
+    offset = _HEADER.size + _BLOCK.size * len(blocks)
+    table = []
+    for name, array in blocks:
+        offset = -(-offset // _ALIGN) * _ALIGN
+        rows = len(array)
+        cols = array.shape[1] if array.ndim > 1 else 1
+        table.append((name, array, offset, rows, cols))
+        offset += array.nbytes
+
+    # Пишемо в тимчасовий файл і підміняємо ним старий: обрізання файлу, відкритого
+    # через mmap (наприклад, під час експорту імпортованого проєкту), дає SIGBUS
+    temporary = f"{filename}.tmp"
+    with open(temporary, 'wb') as f:
+        axis = _AXES.index(index.axis) if index is not None else 0
+        f.write(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(blocks), axis))
+        for name, array, offset, rows, cols in table:
+            f.write(_BLOCK.pack(name.encode(), array.dtype.str.encode(), offset, rows, cols))
+        for name, array, offset, rows, cols in table:
+            f.write(b'\0' * (offset - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(temporary, filename)
+
+
+def read_project_binary(filename):
+    """
+    Відкриває бінарний проєкт через mmap і повертає BinaryProject з представленнями NumPy.
+
+    Дані не копіюються, тому відкриття займає час, що не залежить від розміру файлу.
+    """
+    with open(filename, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, count = _HEADER_V1.unpack_from(mapping, 0)
+    if magic != BINARY_MAGIC:
+        mapping.close()
+        raise ValueError("Not a binary polygon project")
+    if version not in (1, BINARY_VERSION):
+        mapping.close()
+        raise ValueError(f"Unsupported project version: {version}")
+    axis, table = 'y', _HEADER_V1.size
+    if version >= 2:
+        axis, table = _AXES[_HEADER.unpack_from(mapping, 0)[3]], _HEADER.size
+
+    blocks = {}
+    for i in range(count):
+        name, dtype, offset, rows, cols = _BLOCK.unpack_from(mapping, table + i * _BLOCK.size)
+        dtype = np.dtype(dtype.rstrip(b'\0').decode())
+        if rows * cols:
+            array = np.frombuffer(mapping, dtype=dtype, count=rows * cols, offset=offset)
+        else:
+            array = np.empty(0, dtype=dtype)
+        blocks[name.rstrip(b'\0').decode()] = array.reshape(rows, cols) if cols > 1 else array
+
+    offsets = blocks["ring_offsets"].tolist()
+    vertices = blocks["vertices"]
+    rings = [vertices[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+
+    index = None
+    if "index_keys" in blocks:
+        index = PointLocationIndex(blocks["index_ys"], blocks["index_xs"], blocks["index_keys"],
+                                   blocks["index_x_end"], blocks["index_rect_ids"], axis)
+
+    return BinaryProject(rings[0], rings[1:], blocks["rectangles"], index, mapping)
+
+
+def is_binary_project(filename):
+    """Перевіряє сигнатуру бінарного проєкту на початку файлу."""
+    with open(filename, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def load_project(filename):
+    """
+    Відкриває проєкт у будь-якому форматі: бінарний через mmap, JSON - потоково.
+
+    Returns:
+        Tuple[np.ndarray, list, np.ndarray, PointLocationIndex | None]:
+        Вершини, отвори, прямокутники (r, 4) та індекс (лише для бінарного формату)
+    """
+    if is_binary_project(filename):
+        project = read_project_binary(filename)
+        return project.polygon, project.holes, project.rectangles, project.index
+    polygon, rectangles = read_project_json(filename)
+    return polygon, [], rectangles, None
@@ -0,0 +1,115 @@
+import numpy as np
+from utils import decompose_polygon_sweep, repeat_ranges
+
+
+class PointLocationIndex:
+    """
+    Структура шарів для пакетного пошуку точок у розбивці полігону.
+
+    Усі різні Y прямокутників ділять площину на горизонтальні шари. У кожному
+    шарі інтервали [x1, x2) прямокутників, що його перетинають, відсортовані за x1.
+    Щоб шукати по всіх шарах одним np.searchsorted, ключ інтервалу складається
+    з номера шару та рангу x1 серед усіх різних x1: slab * stride + rank.
+
+    Прямокутники вважаються напіввідкритими [x1, x2) x [y1, y2), тому точки на
+    правій і нижній (більшій за Y) межі полігону вважаються зовнішніми.
+
+    Для axis='x' шари вертикальні, і ролі X та Y міняються місцями: ys зберігає
+    межі по X, а інтервали в шарах ідуть по Y.
+    """
+
+    def __init__(self, ys, xs, keys, x_end, rect_ids, axis='y'):
+        self.ys = ys              # межі шарів, (K + 1,)
+        self.xs = xs              # різні x1, (U,)
+        self.keys = keys          # slab * stride + rank(x1), відсортовані, (E,)
+        self.x_end = x_end        # x2 відповідного інтервалу, (E,)
+        self.rect_ids = rect_ids  # індекс прямокутника в розбивці, (E,)
+        self.axis = axis          # вісь, уздовж якої йдуть шари: 'y' або 'x'
+
+    @property
+    def stride(self):
+        return len(self.xs) + 1
+
+    @staticmethod
+    def _entries(lo, hi):
+        """Кількість інтервалів у шарах, якщо шари розділяють межі lo та hi."""
+        bounds = np.unique(np.concatenate((lo, hi)))
+        return int((np.searchsorted(bounds, hi) - np.searchsorted(bounds, lo)).sum())
+
+    @classmethod
+    def from_rectangles(cls, rectangles, axis=None):
+        """
+        Будує індекс з прямокутників, що не перетинаються (вихід decompose_polygon_sweep).
+
+        Прямокутник дає по інтервалу в кожному шарі, який перетинає, тож шари
+        мають іти вздовж осі замітання: смуги direction='x' у горизонтальних
+        шарах (і об'єднані прямокутники) розмножуються квадратично. Якщо axis
+        None, обирається вісь з меншою кількістю інтервалів - її не більше, ніж
+        смуг замітання, з яких отримано прямокутники.
+        """
+        rects = np.asarray(rectangles, dtype=np.float64).reshape(-1, 4)
+        x1 = np.minimum(rects[:, 0], rects[:, 2])
+        x2 = np.maximum(rects[:, 0], rects[:, 2])
+        y1 = np.minimum(rects[:, 1], rects[:, 3])
+        y2 = np.maximum(rects[:, 1], rects[:, 3])
+
+        # Вироджені прямокутники нульової площі не містять жодної точки
+        ids = np.nonzero((x2 > x1) & (y2 > y1))[0]
+        x1, x2, y1, y2 = x1[ids], x2[ids], y1[ids], y2[ids]
+        if axis is None:
+            axis = 'y' if cls._entries(y1, y2) <= cls._entries(x1, x2) else 'x'
+        if axis == 'x':
+            x1, x2, y1, y2 = y1, y2, x1, x2
+
+        ys = np.unique(np.concatenate((y1, y2)))
+        xs = np.unique(x1)
+        k1 = np.searchsorted(ys, y1)
+        k2 = np.searchsorted(ys, y2)
+
+        # Кожен прямокутник дає по інтервалу в кожному шарі [k1, k2)
+        owner, local = repeat_ranges(k2 - k1)
+        slab = k1[owner] + local
+        keys = slab * (len(xs) + 1) + np.searchsorted(xs, x1[owner])
+
+        order = np.argsort(keys, kind='stable')
+        return cls(ys, xs, keys[order], x2[owner][order], ids[owner][order], axis)
+
+    @classmethod
+    def from_polygon(cls, polygon, holes=()):
+        """Розбиває полігон замітальною прямою і будує індекс за отриманими прямокутниками."""
+        return cls.from_rectangles(decompose_polygon_sweep(polygon, holes))
+
+    def locate(self, points):
+        """
+        Знаходить прямокутник розбивки для кожної точки за O((m + n) log n).
+
+        Args:
+            points: Масив точок (m, 2)
+
+        Returns:
+            np.ndarray: Індекси прямокутників (m,), -1 для точок поза полігоном
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if self.axis == 'x':
+            points = points[:, ::-1]
+        result = np.full(len(points), -1, dtype=np.int64)
+        if len(self.keys) == 0:
+            return result
+
+        slab = np.searchsorted(self.ys, points[:, 1], side='right') - 1
+        rank = np.searchsorted(self.xs, points[:, 0], side='right') - 1
+        valid = (slab >= 0) & (slab < len(self.ys) - 1) & (rank >= 0)
+
+        # Останній інтервал шару з x1 <= x
+        pos = np.searchsorted(self.keys, slab * self.stride + rank, side='right') - 1
+        valid &= pos >= 0
+        pos = np.where(valid, pos, 0)
+        valid &= self.keys[pos] // self.stride == slab
+        valid &= points[:, 0] < self.x_end[pos]
+
+        result[valid] = self.rect_ids[pos[valid]]
+        return result
+
+    def contains(self, points):
+        """Булева маска (m,): чи лежить кожна точка всередині полігону."""
+        return self.locate(points) >= 0
@@ -0,0 +1,181 @@
+import math
+from collections import defaultdict
+from sortedcontainers import SortedList
+
+
+class SnapIndex:
+    """
+    Індекс вершин та горизонтальних/вертикальних ребер полігону для прив'язки курсора.
+
+    Вершини зберігаються у порядку додавання; ребро i з'єднує вершини i - 1 та i,
+    якщо вершина i не починає новий контур.
+
+    Вершини та короткі ребра (не довші за max_edge_cells клітинок) лежать у
+    рівномірній сітці кошиків з ключами ('v', i) та ('e', i), тож кожен об'єкт
+    займає сталу кількість кошиків. Довгі ребра зберігаються у SortedList:
+    горизонтальні за y, вертикальні за x, і шукаються діапазоном по цій координаті.
+    Пам'ять і час побудови залежать від кількості ребер, а не від їхньої довжини.
+    """
+
+    def __init__(self, cell_size=100.0, max_edge_cells=4):
+        self.default_cell_size = cell_size
+        self.cell_size = cell_size
+        self.max_edge_cells = max_edge_cells
+        self.clear()
+
+    def __len__(self):
+        return len(self.points)
+
+    def clear(self):
+        self.cell_size = self.default_cell_size
+        self.points = []
+        self.linked = []  # linked[i] - чи є ребро з вершини i - 1 у вершину i
+        self.buckets = defaultdict(set)
+        self.horizontal = SortedList()  # (y, x_min, x_max, i) довгих горизонтальних ребер
+        self.vertical = SortedList()    # (x, y_min, y_max, i) довгих вертикальних ребер
+
+    def _cells(self, x1, y1, x2, y2):
+        """Кошики, що перетинає прямокутник [x1, x2] x [y1, y2]."""
+        c = self.cell_size
+        for i in range(math.floor(min(x1, x2) / c), math.floor(max(x1, x2) / c) + 1):
+            for j in range(math.floor(min(y1, y2) / c), math.floor(max(y1, y2) / c) + 1):
+                yield i, j
+
+    def _edge(self, i):
+        """Кінці ребра i, якщо воно горизонтальне або вертикальне."""
+        if i <= 0 or i >= len(self.points) or not self.linked[i]:
+            return None
+        (x1, y1), (x2, y2) = self.points[i - 1], self.points[i]
+        if abs(x1 - x2) < 0.001 or abs(y1 - y2) < 0.001:
+            return x1, y1, x2, y2
+        return None
+
+    def _long_key(self, i, edge):
+        """Ключ ребра у SortedList і сам список, або None для короткого ребра."""
+        x1, y1, x2, y2 = edge
+        if max(abs(x2 - x1), abs(y2 - y1)) <= self.cell_size * self.max_edge_cells:
+            return None
+        if abs(y1 - y2) < 0.001:
+            return self.horizontal, (y1, min(x1, x2), max(x1, x2), i)
+        return self.vertical, (x1, min(y1, y2), max(y1, y2), i)
+
+    def append(self, x, y, connect=True):
+        """Додає вершину та, якщо connect, ребро від попередньої вершини."""
+        i = len(self.points)
+        self.points.append((x, y))
+        self.linked.append(connect)
+        for cell in self._cells(x, y, x, y):
+            self.buckets[cell].add(('v', i))
+        edge = self._edge(i)
+        if edge:
+            long_key = self._long_key(i, edge)
+            if long_key:
+                long_key[0].add(long_key[1])
+            else:
+                for cell in self._cells(*edge):
+                    self.buckets[cell].add(('e', i))
+
+    def pop(self):
+        """Видаляє останню вершину та ребро, що до неї веде."""
+        if not self.points:
+            return
+        i = len(self.points) - 1
+        x, y = self.points[i]
+        edge = self._edge(i)
+        long_key = self._long_key(i, edge) if edge else None
+        if long_key:
+            long_key[0].remove(long_key[1])
+        edge_cells = self._cells(*edge) if edge and not long_key else ()
+        for kind, cells in (('v', self._cells(x, y, x, y)), ('e', edge_cells)):
+            for cell in cells:
+                bucket = self.buckets[cell]
+                bucket.discard((kind, i))
+                if not bucket:
+                    del self.buckets[cell]
+        self.points.pop()
+        self.linked.pop()
+
+    def extend(self, points, closed=False):
+        """
+        Додає окремий контур, не з'єднаний з попередніми вершинами.
+
+        Якщо closed, перша вершина додається ще раз у кінці, щоб ребро від
+        останньої вершини до першої теж потрапило в індекс (як у build, де
+        контур приходить із повтореною першою вершиною).
+        """
+        points = list(points)
+        for k, (x, y) in enumerate(points):
+            self.append(x, y, connect=k > 0)
+        if closed and len(points) > 1:
+            self.append(*points[0])
+
+    def build(self, points):
+        """
+        Перебудовує індекс для списку вершин (x, y).
+
+        Розмір клітинки береться з густини вершин (середня відстань між ними в
+        габаритах полігону), тож у кошику в середньому одна вершина; подальші
+        append використовують той самий розмір.
+        """
+        points = list(points)
+        self.clear()
+        if len(points) > 1:
+            xs = [x for x, _ in points]
+            ys = [y for _, y in points]
+            width, height = max(xs) - min(xs), max(ys) - min(ys)
+            spacing = math.sqrt(width * height / len(points)) or max(width, height) / len(points)
+            if spacing > 0:
+                self.cell_size = spacing
+        self.extend(points)
+
+    def nearest(self, x, y, radius):
+        """
+        Шукає найближчу вершину, а якщо її немає в радіусі - найближчу точку на ребрі.
+
+        Returns:
+            Tuple[float, float, str] | None: Точка прив'язки та її тип ('vertex' або 'edge')
+        """
+        best_vertex, best_edge = None, None
+        vertex_dist, edge_dist = radius * radius, radius * radius
+
+        c = self.cell_size
+        i0, i1 = math.floor((x - radius) / c), math.floor((x + radius) / c)
+        j0, j1 = math.floor((y - radius) / c), math.floor((y + radius) / c)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.buckets):
+            # При сильному віддаленні непорожніх кошиків менше, ніж клітинок в околі
+            buckets = [b for (i, j), b in self.buckets.items() if i0 <= i <= i1 and j0 <= j <= j1]
+        else:
+            buckets = [self.buckets[cell] for cell in self._cells(x - radius, y - radius, x + radius, y + radius)
+                       if cell in self.buckets]
+
+        edges = []
+        for bucket in buckets:
+            for kind, i in bucket:
+                if kind == 'v':
+                    px, py = self.points[i]
+                    d = (px - x) ** 2 + (py - y) ** 2
+                    if d <= vertex_dist:
+                        vertex_dist, best_vertex = d, (px, py)
+                else:
+                    edges.append(self._edge(i))
+
+        # Довгі ребра: смуга шириною 2 * radius навколо y (горизонтальні) або x (вертикальні)
+        for ey, lo, hi, _ in self.horizontal.irange((y - radius,), (y + radius, math.inf)):
+            if lo - radius <= x <= hi + radius:
+                edges.append((lo, ey, hi, ey))
+        for ex, lo, hi, _ in self.vertical.irange((x - radius,), (x + radius, math.inf)):
+            if lo - radius <= y <= hi + radius:
+                edges.append((ex, lo, ex, hi))
+
+        for x1, y1, x2, y2 in edges:
+            px = min(max(x, min(x1, x2)), max(x1, x2))
+            py = min(max(y, min(y1, y2)), max(y1, y2))
+            d = (px - x) ** 2 + (py - y) ** 2
+            if d <= edge_dist:
+                edge_dist, best_edge = d, (px, py)
+
+        if best_vertex:
+            return best_vertex[0], best_vertex[1], 'vertex'
+        if best_edge:
+            return best_edge[0], best_edge[1], 'edge'
+        return None
@@ -0,0 +1,181 @@
+import os
+import sys
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PySide6.QtCore import QRectF, QLineF
+from PySide6.QtGui import QGuiApplication, QImage, QPainter, QPen, QBrush, QColor
+from utils import decompose_polygon_sweep, repeat_ranges
+from project_io import load_project
+
+# Ті ж кольори, що й у GridView.decompose_polygon
+RECT_COLORS = [
+    QColor(255, 100, 100, 150),  # Light red
+    QColor(100, 255, 100, 150),  # Light green
+    QColor(100, 100, 255, 150),  # Light blue
+    QColor(255, 255, 100, 150),  # Light yellow
+    QColor(255, 100, 255, 150),  # Light magenta
+    QColor(100, 255, 255, 150),  # Light cyan
+]
+BACKGROUND_COLOR = QColor(240, 240, 240)
+RECT_PEN_COLOR = QColor(0, 0, 0, 200)
+POLYGON_PEN_COLOR = QColor(0, 150, 0, 255)
+
+_app = None
+
+
+def _ensure_app():
+    """Створює QGuiApplication на offscreen-платформі, якщо застосунок ще не запущено."""
+    global _app
+    if QGuiApplication.instance() is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        _app = QGuiApplication([])
+
+
+def _polygon_edges(rings):
+    """Ребра всіх контурів як масив (m, 4): x1, y1, x2, y2."""
+    edges = []
+    for ring in rings:
+        ring = np.asarray(ring, dtype=np.float64)
+        if len(ring):
+            edges.append(np.hstack((ring, np.roll(ring, -1, axis=0))))
+    return np.vstack(edges) if edges else np.empty((0, 4))
+
+
+def bucket_by_tile(boxes, origin, scale, tile_size, cols, rows, pad=0):
+    """
+    Розкладає прямокутники (x1, y1, x2, y2) по плитках, які вони перетинають.
+
+    Args:
+        boxes: Масив (r, 4) у координатах сцени
+        origin: Лівий верхній кут зображення у координатах сцени
+        scale: Пікселів на одиницю сцени
+        tile_size: Розмір плитки у пікселях
+        cols, rows: Кількість плиток по горизонталі та вертикалі
+        pad: Запас у пікселях на товщину пера
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Індекси прямокутників, впорядковані за плитками,
+        та зміщення starts, де плитці t відповідає відрізок [starts[t], starts[t + 1])
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64), np.zeros(cols * rows + 1, dtype=np.int64)
+
+    x_lo = (np.minimum(boxes[:, 0], boxes[:, 2]) - origin[0]) * scale - pad
+    x_hi = (np.maximum(boxes[:, 0], boxes[:, 2]) - origin[0]) * scale + pad
+    y_lo = (np.minimum(boxes[:, 1], boxes[:, 3]) - origin[1]) * scale - pad
+    y_hi = (np.maximum(boxes[:, 1], boxes[:, 3]) - origin[1]) * scale + pad
+    c0 = np.clip(np.floor(x_lo / tile_size), 0, cols - 1).astype(np.int64)
+    c1 = np.clip(np.floor(x_hi / tile_size), 0, cols - 1).astype(np.int64)
+    r0 = np.clip(np.floor(y_lo / tile_size), 0, rows - 1).astype(np.int64)
+    r1 = np.clip(np.floor(y_hi / tile_size), 0, rows - 1).astype(np.int64)
+
+    # Кожен прямокутник дає (c1 - c0 + 1) * (r1 - r0 + 1) пар «прямокутник-плитка»
+    widths = c1 - c0 + 1
+    idx, local = repeat_ranges(widths * (r1 - r0 + 1))
+    tile = (r0[idx] + local // widths[idx]) * cols + c0[idx] + local % widths[idx]
+
+    order = np.argsort(tile, kind='stable')
+    starts = np.searchsorted(tile[order], np.arange(cols * rows + 1))
+    return idx[order], starts
+
+
+def export_tiles(directory, polygon, rectangles, holes=(), scale=None, size=20000, tile_size=2048,
+                 workers=None, antialiasing=True):
+    """
+    Рендерить полігон і його розбивку у набір PNG-плиток без вікна.
+
+    У кожну плитку малюються лише прямокутники та ребра, що її перетинають.
+    Плитки рендеряться паралельно і одразу записуються на диск, тому пам'ять
+    обмежена розміром плитки, а не всього зображення.
+
+    Args:
+        directory: Каталог для файлів tile_<row>_<col>.png
+        polygon: Вершини полігону у координатах сцени
+        rectangles: Прямокутники ((x1, y1), (x2, y2)) з decompose_polygon_sweep
+        holes: Контури отворів
+        scale: Пікселів на одиницю сцени; якщо None - обчислюється з size
+        size: Довжина більшої сторони зображення у пікселях
+        tile_size: Розмір плитки у пікселях
+        workers: Кількість потоків рендерингу (за замовчуванням os.cpu_count())
+        antialiasing: Згладжування ліній
+
+    Returns:
+        Tuple[int, int]: Кількість рядків і стовпців плиток
+    """
+    start = round(time.time() * 1000)
+    _ensure_app()
+
+    rects = np.asarray(rectangles, dtype=np.float64).reshape(-1, 4)
+    edges = _polygon_edges((polygon, *holes))
+    points = np.vstack((rects.reshape(-1, 2), edges[:, :2]))
+    if len(points) == 0:
+        raise ValueError("Nothing to export")
+
+    origin = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - origin, 1e-9)
+    if scale is None:
+        scale = size / extent.max()
+    width = max(1, math.ceil(extent[0] * scale) + 1)
+    height = max(1, math.ceil(extent[1] * scale) + 1)
+    cols = -(-width // tile_size)
+    rows = -(-height // tile_size)
+
+    rect_order, rect_starts = bucket_by_tile(rects, origin, scale, tile_size, cols, rows, pad=2)
+    edge_order, edge_starts = bucket_by_tile(edges, origin, scale, tile_size, cols, rows, pad=3)
+
+    rect_pen = QPen(RECT_PEN_COLOR, 1)
+    rect_pen.setCosmetic(True)
+    polygon_pen = QPen(POLYGON_PEN_COLOR, 3)
+    polygon_pen.setCosmetic(True)
+    os.makedirs(directory, exist_ok=True)
+
+    def render_tile(tile):
+        row, col = divmod(tile, cols)
+        tile_w = min(tile_size, width - col * tile_size)
+        tile_h = min(tile_size, height - row * tile_size)
+        image = QImage(tile_w, tile_h, QImage.Format_ARGB32_Premultiplied)
+        image.fill(BACKGROUND_COLOR)
+
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing, antialiasing)
+        painter.translate(-col * tile_size, -row * tile_size)
+        painter.scale(scale, scale)
+        painter.translate(-origin[0], -origin[1])
+
+        # Прямокутники групуються за кольором, щоб малювати їх одним викликом
+        painter.setPen(rect_pen)
+        ids = rect_order[rect_starts[tile]:rect_starts[tile + 1]]
+        for c, color in enumerate(RECT_COLORS):
+            group = ids[ids % len(RECT_COLORS) == c]
+            if len(group):
+                painter.setBrush(QBrush(color))
+                painter.drawRects([QRectF(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in rects[group].tolist()])
+
+        ids = edge_order[edge_starts[tile]:edge_starts[tile + 1]]
+        if len(ids):
+            painter.setPen(polygon_pen)
+            painter.drawLines([QLineF(x1, y1, x2, y2) for x1, y1, x2, y2 in edges[ids].tolist()])
+        painter.end()
+
+        image.save(os.path.join(directory, f"tile_{row:04d}_{col:04d}.png"))
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        list(executor.map(render_tile, range(rows * cols)))
+
+    print(f"Exported {rows}x{cols} tiles ({width}x{height}px) in {round(time.time() * 1000) - start} ms")
+    return rows, cols
+
+
+if __name__ == "__main__":
+    # python tiles.py data.json|data.polybin out_dir [size]
+    if len(sys.argv) < 3:
+        print("Usage: python tiles.py <data.json|data.polybin> <out_dir> [size]")
+        sys.exit(1)
+
+    polygon, holes, rectangles, _ = load_project(sys.argv[1])
+    if not len(rectangles):
+        rectangles = decompose_polygon_sweep(polygon.tolist(), [hole.tolist() for hole in holes])
+    export_tiles(sys.argv[2], polygon, rectangles, holes=holes,
+                 size=int(sys.argv[3]) if len(sys.argv) > 3 else 20000)
@@ -1,30 +1,15 @@
+import os
 import time
 import math
 import random
+import multiprocessing
+import numpy as np
 from typing import List, Tuple
 from sortedcontainers import SortedList
 
-def decompose_polygon_sweep(polygon: List[Tuple[int, int]]) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
-    start = round(time.time() * 1000)
-    """Розбивка ізотетичного полігону на прямокутники з оптимізованою складністю O(n log n)."""
-    if len(polygon) < 3:
-        return []
-
-    events = []
-    n = len(polygon)
-    for i in range(n):
-        p1 = polygon[i]
-        p2 = polygon[(i + 1) % n]
-        if p1[0] == p2[0]:  # Вертикальне ребро
-            y_start, y_end = min(p1[1], p2[1]), max(p1[1], p2[1])
-            events.append((y_start, 'start', p1[0]))  # Початок ребра
-            events.append((y_end, 'end', p1[0]))      # Кінець ребра
-
-    # Сортуємо події за Y-координатою
-    events.sort()  # O(n log n)
-
+def _sweep_events(events, active_edges):
+    """Прохід замітальної прямої по відсортованих подіях з заданим початковим станом активних ребер."""
     rectangles = []
-    active_edges = SortedList()  # Використовуємо SortedList для активних ребер
     prev_y = None
 
     # Обробляємо події
@@ -46,6 +31,249 @@ def decompose_polygon_sweep(polygon: List[Tuple[int, int]]) -> List[Tuple[Tuple[
 
         prev_y = y
 
+    return rectangles
+
+
+def repeat_ranges(counts):
+    """
+    Розгортає діапазони довжин counts у плоский масив пар без циклу Python.
+
+    Спільний крок розкладання прямокутників по клітинках, плитках, смугах і шарах:
+    прямокутник i дає counts[i] пар, а номер пари всередині діапазону задає
+    конкретну клітинку.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: owner - номер діапазону кожної пари,
+        local - номер пари у своєму діапазоні, від 0 до counts[owner] - 1
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, local
+
+
+def _sweep_events_slab(args):
+    """
+    Замітання одного горизонтального шару у процесі-воркері, повністю в NumPy.
+
+    Ребро з інтервалами [k1, k2) між сусідніми різними Y активне в кожному з них.
+    Пари (інтервал, x) усіх активних ребер, відсортовані за інтервалом і x,
+    чергуються ліве-праве, тож парні та непарні позиції - це межі прямокутників.
+    Смуги нульової висоти не виникають, а результат - суцільний масив (r, 4)
+    x1, y1, x2, y2, який передається з воркера без розпакування кортежів.
+    """
+    x, k1, k2, ys = args  # k1, k2 - номери інтервалів у межах шару, ys - лише межі шару
+    owner, local = repeat_ranges(k2 - k1)
+    interval = k1[owner] + local
+    xs = x[owner]
+    order = np.lexsort((xs, interval))
+    xs, interval = xs[order], interval[order]
+    rows = interval[0::2]
+    return np.column_stack((xs[0::2], ys[rows], xs[1::2], ys[rows + 1]))
+
+
+def _merge_strip_array(rects):
+    """Векторизований аналог merge_vertical_strips для масиву (r, 4) у порядку замітання."""
+    if not len(rects):
+        return rects
+    order = np.lexsort((rects[:, 1], rects[:, 2], rects[:, 0]))
+    r = rects[order]
+    # Нова група там, де змінюється інтервал по X або смуга не продовжує попередню
+    start = np.ones(len(r), dtype=bool)
+    start[1:] = (r[1:, 0] != r[:-1, 0]) | (r[1:, 2] != r[:-1, 2]) | (r[1:, 1] != r[:-1, 3])
+    first = np.nonzero(start)[0]
+    last = np.append(first[1:], len(r)) - 1
+    merged = np.column_stack((r[first, 0], r[first, 1], r[first, 2], r[last, 3]))
+    return merged[np.lexsort((merged[:, 0], merged[:, 1]))]
+
+
+def _build_sweep_events(polygon, holes=()):
+    """Події замітальної прямої (y, тип, x) для вертикальних ребер полігону та отворів, відсортовані за Y."""
+    events = []
+    for ring in (polygon, *holes):
+        n = len(ring)
+        for i in range(n):
+            p1 = ring[i]
+            p2 = ring[(i + 1) % n]
+            if p1[0] == p2[0]:  # Вертикальне ребро
+                y_start, y_end = min(p1[1], p2[1]), max(p1[1], p2[1])
+                events.append((y_start, 'start', p1[0]))  # Початок ребра
+                events.append((y_end, 'end', p1[0]))      # Кінець ребра
+
+    # Сортуємо події за Y-координатою
+    events.sort()  # O(n log n)
+    return events
+
+
+def estimate_sweep_output(polygon, holes=(), direction='y'):
+    """
+    Точна кількість прямокутників, яку дасть замітання у напрямку direction,
+    обчислена лише зі статистики подій без побудови прямокутників.
+
+    На кожній події замітання видає стільки прямокутників, скільки пар активних
+    ребер (active // 2), а кількість активних ребер - це префіксна сума +1/-1
+    по відсортованих подіях.
+    """
+    axis = 1 if direction == 'y' else 0
+    positions, deltas = [], []
+    for ring in (polygon, *holes):
+        ring = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+        if not len(ring):
+            continue
+        nxt = np.roll(ring, -1, axis=0)
+        parallel = ring[:, 1 - axis] == nxt[:, 1 - axis]  # ребра, перпендикулярні до замітальної прямої
+        lo = np.minimum(ring[parallel, axis], nxt[parallel, axis])
+        hi = np.maximum(ring[parallel, axis], nxt[parallel, axis])
+        positions += [lo, hi]
+        deltas += [np.ones(len(lo), dtype=np.int64), -np.ones(len(hi), dtype=np.int64)]
+    if not positions:
+        return 0
+
+    positions = np.concatenate(positions)
+    deltas = np.concatenate(deltas)
+    # Як і в _build_sweep_events: за координатою, кінці ребер ('end') раніше за початки ('start')
+    order = np.lexsort((deltas, positions))
+    active = np.cumsum(deltas[order])[:-1]
+    return int((active // 2).sum())
+
+
+def choose_sweep_direction(polygon, holes=()):
+    """Обирає напрямок замітання ('x' або 'y'), що дає менше прямокутників."""
+    if estimate_sweep_output(polygon, holes, 'x') < estimate_sweep_output(polygon, holes, 'y'):
+        return 'x'
+    return 'y'
+
+
+def _transpose_ring(ring):
+    return [(y, x) for x, y in ring]
+
+
+def _transpose_rectangles(rectangles):
+    return [((y1, x1), (y2, x2)) for (x1, y1), (x2, y2) in rectangles]
+
+
+def decompose_polygon_sweep(polygon: List[Tuple[int, int]], holes=(), direction='y') -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    start = round(time.time() * 1000)
+    """
+    Розбивка ізотетичного полігону (з необов'язковими отворами) на прямокутники з оптимізованою складністю O(n log n).
+
+    direction: 'y' - замітання вздовж Y по вертикальних ребрах, 'x' - вздовж X по
+    горизонтальних, 'auto' - напрямок з меншою кількістю прямокутників (choose_sweep_direction).
+    """
+    if len(polygon) < 3:
+        return []
+
+    if direction == 'auto':
+        direction = choose_sweep_direction(polygon, holes)
+    if direction == 'x':
+        # Замітання вздовж X - це замітання вздовж Y для транспонованого полігону
+        polygon = _transpose_ring(polygon)
+        holes = [_transpose_ring(hole) for hole in holes]
+
+    events = _build_sweep_events(polygon, holes)
+    active_edges = SortedList()  # Використовуємо SortedList для активних ребер
+    rectangles = _sweep_events(events, active_edges)
+    if direction == 'x':
+        rectangles = _transpose_rectangles(rectangles)
+
+    print('Took : ', round(time.time() * 1000) - start, 'ms')
+    return rectangles
+
+
+def merge_vertical_strips(rectangles):
+    """
+    Об'єднує прямокутники з однаковим інтервалом по X, що дотикаються по Y.
+
+    Очікує прямокутники у порядку замітання (за зростанням нижньої Y), як їх
+    повертає decompose_polygon_sweep. Вироджені смуги нульової висоти відкидаються.
+    """
+    merged = []
+    open_rects = {}  # (x1, x2) -> індекс прямокутника, що останнім закінчився на цьому інтервалі
+    for (x1, y1), (x2, y2) in rectangles:
+        key = (x1, x2)
+        idx = open_rects.get(key)
+        if idx is not None and merged[idx][1][1] == y1:
+            merged[idx] = (merged[idx][0], (x2, y2))
+        elif y1 != y2:
+            open_rects[key] = len(merged)
+            merged.append(((x1, y1), (x2, y2)))
+    return merged
+
+
+def decompose_polygon_sweep_parallel(polygon: List[Tuple[int, int]], workers=None, slabs=None, merge=False,
+                                     holes=(), direction='y', as_array=False):
+    """
+    Паралельна розбивка одного полігону: проміжки між різними Y діляться на шари
+    з рівною кількістю прямокутників, кожен шар замітається окремим процесом.
+
+    Воркери отримують лише свої ребра та межі шару і повертають масиви float64,
+    які з'єднуються np.concatenate. Перетворення у кортежі (as_array=False)
+    виконується послідовно в батьківському процесі і на великих полігонах займає
+    більшу частину часу, тож для прискорення від кількості процесів потрібен
+    as_array=True.
+
+    Args:
+        polygon: Вершини ізотетичного полігону
+        workers: Кількість процесів (за замовчуванням os.cpu_count())
+        slabs: Кількість шарів (за замовчуванням дорівнює workers)
+        merge: Об'єднати смуги з однаковим інтервалом по X, включно зі швами між шарами
+        holes: Контури отворів
+        direction: Напрямок замітання 'y', 'x' або 'auto', як у decompose_polygon_sweep
+        as_array: Повернути масив (r, 4) x1, y1, x2, y2 замість списку кортежів (без послідовного перетворення)
+
+    Returns:
+        Прямокутники decompose_polygon_sweep без смуг нульової висоти
+        (або об'єднані, якщо merge=True)
+    """
+    start = round(time.time() * 1000)
+    if len(polygon) < 3:
+        return np.empty((0, 4)) if as_array else []
+
+    workers = workers or os.cpu_count() or 1
+    if direction == 'auto':
+        direction = choose_sweep_direction(polygon, holes)
+    axis = 1 if direction == 'y' else 0
+
+    # Ребра, перпендикулярні до замітальної прямої: x та межі по осі замітання
+    xs, lo, hi = [], [], []
+    for ring in (polygon, *holes):
+        ring = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+        nxt = np.roll(ring, -1, axis=0)
+        edge = (ring[:, 1 - axis] == nxt[:, 1 - axis]) & (ring[:, axis] != nxt[:, axis])
+        xs.append(ring[edge, 1 - axis])
+        lo.append(np.minimum(ring[edge, axis], nxt[edge, axis]))
+        hi.append(np.maximum(ring[edge, axis], nxt[edge, axis]))
+    xs, lo, hi = np.concatenate(xs), np.concatenate(lo), np.concatenate(hi)
+    ys = np.unique(np.concatenate((lo, hi)))
+    k1, k2 = np.searchsorted(ys, lo), np.searchsorted(ys, hi)
+
+    # Межі шарів за накопиченою кількістю активних ребер, тобто за розміром виходу
+    intervals = max(len(ys) - 1, 0)
+    active = np.cumsum(np.bincount(k1, minlength=len(ys)) - np.bincount(k2, minlength=len(ys)))[:intervals]
+    load = np.cumsum(active)
+    slabs = max(1, min(slabs or workers, intervals))
+    bounds = np.unique(np.concatenate(([0], np.searchsorted(load, load[-1] * np.arange(1, slabs) / slabs)
+                                       if intervals else [], [intervals]))).astype(np.int64)
+
+    tasks = []
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        inside = (k1 < b) & (k2 > a)
+        tasks.append((xs[inside], np.maximum(k1[inside], a) - a, np.minimum(k2[inside], b) - a, ys[a:b + 1]))
+
+    if workers > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+            parts = pool.map(_sweep_events_slab, tasks)
+    else:
+        parts = [_sweep_events_slab(task) for task in tasks]
+
+    rectangles = np.concatenate(parts) if parts else np.empty((0, 4))
+    if merge:
+        rectangles = _merge_strip_array(rectangles)
+    if direction == 'x':
+        rectangles = rectangles[:, [1, 0, 3, 2]]
+
+    if not as_array:
+        rectangles = [((x1, y1), (x2, y2)) for x1, y1, x2, y2 in rectangles.tolist()]
     print('Took : ', round(time.time() * 1000) - start, 'ms')
     return rectangles
 